@@ -3,22 +3,107 @@ Platform Analyser - FastAPI Backend
 Main application with CORS, MongoDB, and analysis endpoints
 """
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Union, Optional, Any
-from pymongo import MongoClient
+from contextlib import asynccontextmanager
+import asyncio
+import json
+from array import array
+import time
+from pymongo import AsyncMongoClient, MongoClient
 import os
 from datetime import datetime
 import uvicorn
-from services import analyzer_service
+from services import analyzer_service, MongoSubmissionSyncStore, SubmissionSyncStore
+from http_client import http_transport
+from problem_index import canonical_problem_map
+from ratelimit import RATE_LIMIT_BACKEND, MongoBackend, build_backend
+from persistence import (
+    ANALYSIS_FRESH_SECONDS,
+    ANALYSIS_STALE_SECONDS,
+    AnalysisWriteQueue,
+    analysis_document,
+    ensure_indexes,
+    fetch_history,
+    find_recent_analysis
+)
+from jobs import BULK, INTERACTIVE, JOB_MAX_SETS, LANES, JobQueue, LocalJobStore, MongoJobStore, job_view
+from ranking import LocalRankStore, MongoRankStore, RankIndex
+from scoring import cohort_row, cohort_summary
+from scheduler import TRACKED_LIST_MAX, MongoTrackedProfileStore, RefreshScheduler, TrackedProfileStore
+import logs
+import metrics
+import tracing
+
+
+log = logs.get_logger("app")
+
+
+async def use_in_process_stores():
+    """Drop the MongoDB-backed stores, including those already handed to services"""
+    global db, async_db, analyses_collection, analysis_writer, codeforces_sync_collection
+    global tracked_store, job_store, rank_store
+    mongo_client.close()
+    await async_mongo_client.close()
+    db = None
+    async_db = None
+    analyses_collection = None
+    analysis_writer = None
+    codeforces_sync_collection = None
+    tracked_store = TrackedProfileStore()
+    job_store = LocalJobStore()
+    rank_store = LocalRankStore()
+    analyzer_service.scrapers['codeforces'].sync_store = SubmissionSyncStore()
+    if isinstance(http_transport.rate_limiter.backend, MongoBackend):
+        http_transport.rate_limiter.backend = build_backend('memory')
+    rank_index.store = rank_store
+    job_queue.store = job_store
+    refresh_scheduler.store = tracked_store
+    refresh_scheduler.enabled = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup; flush and close them on shutdown"""
+    canonical_problem_map.load()
+    http_transport.start()
+    if async_db is not None:
+        # The clients connect lazily, so an unreachable server only shows up here
+        try:
+            await async_mongo_client.admin.command("ping")
+        except Exception as e:
+            log.error("MongoDB unreachable, using in-process stores", error=str(e))
+            await use_in_process_stores()
+    if async_db is not None:
+        await ensure_indexes(async_db["analyses"])
+    if analysis_writer is not None:
+        await analysis_writer.start()
+    if isinstance(tracked_store, MongoTrackedProfileStore):
+        await tracked_store.ensure_indexes()
+    if isinstance(job_store, MongoJobStore):
+        await job_store.ensure_indexes()
+    await rank_index.start()
+    await refresh_scheduler.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await refresh_scheduler.stop()
+    await rank_index.stop()
+    if analysis_writer is not None:
+        await analysis_writer.stop()
+    http_transport.close()
+    tracing.exporter.close()
+
 
 # FastAPI app
 app = FastAPI(
     title="Platform Analyser API",
     description="Multi-platform coding profile analyzer with AI insights",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -36,19 +121,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency per route template (not raw path, which would explode label cardinality)"""
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route is not None else "unmatched", str(status_code)
+        ).observe(time.perf_counter() - start)
+
+# Bulk cohort analysis
+COHORT_WORKERS = int(os.getenv("COHORT_WORKERS", "8"))
+COHORT_MAX_SIZE = int(os.getenv("COHORT_MAX_SIZE", "5000"))
+
 # MongoDB connection
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+MONGO_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "5000"))
 DATABASE_NAME = "platform_analyser"
 
 try:
-    mongo_client = MongoClient(MONGO_URI)
+    # Sync client for scraper threads, async client for the request path
+    mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
+    async_mongo_client = AsyncMongoClient(MONGO_URI, serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
     db = mongo_client[DATABASE_NAME]
+    async_db = async_mongo_client[DATABASE_NAME]
     analyses_collection = db["analyses"]
-    print(f"✅ Connected to MongoDB at {MONGO_URI}")
+    # Analyses are written in the background, in bulk
+    analysis_writer = AnalysisWriteQueue(async_db["analyses"])
+    # Per-handle CodeForces submission watermarks for incremental syncs
+    codeforces_sync_collection = db["codeforces_sync"]
+    analyzer_service.scrapers['codeforces'].sync_store = MongoSubmissionSyncStore(codeforces_sync_collection)
+    # Token buckets shared by every worker when the MongoDB backend is selected
+    if RATE_LIMIT_BACKEND == "mongodb":
+        http_transport.rate_limiter.backend = MongoBackend(db["rate_limits"])
+    # Profile sets refreshed in the background by the scheduler
+    tracked_store = MongoTrackedProfileStore(async_db["tracked_profiles"])
+    # Analysis jobs, shared by every worker process
+    job_store = MongoJobStore(async_db["jobs"])
+    # Percentile rank counts, shared by every worker process
+    rank_store = MongoRankStore(async_db["rank_members"], async_db["rank_histograms"])
+    log.info("Connected to MongoDB")
 except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
+    log.error("MongoDB connection failed, using in-process stores", error=str(e))
     db = None
+    async_db = None
     analyses_collection = None
+    analysis_writer = None
+    codeforces_sync_collection = None
+    tracked_store = TrackedProfileStore()
+    job_store = LocalJobStore()
+    rank_store = LocalRankStore()
 
 
 # Request models
@@ -66,13 +197,51 @@ class AnalyseRequest(BaseModel):
     profiles: Dict[str, Union[str, List[str]]]
 
 
+class CohortRequest(BaseModel):
+    model_config = {"json_schema_extra": {
+        "example": {
+            "cohort": [
+                {"profiles": {"leetcode": "AayushShrivastav"}},
+                {"profiles": {"codeforces": "tourist", "gfg": "ashrivas537s"}}
+            ]
+        }
+    }}
+    
+    cohort: List[AnalyseRequest]
+    refresh: bool = False
+
+
+class JobRequest(BaseModel):
+    model_config = {"json_schema_extra": {
+        "example": {
+            "cohort": [
+                {"profiles": {"leetcode": ["AayushShrivastav", "username2"]}},
+                {"profiles": {"codeforces": "tourist"}}
+            ],
+            "lane": "bulk"
+        }
+    }}
+    
+    # Either one profile set or a cohort of them
+    profiles: Optional[Dict[str, Union[str, List[str]]]] = None
+    cohort: Optional[List[AnalyseRequest]] = None
+    # interactive (default for a single profile set) or bulk
+    lane: Optional[str] = None
+    refresh: bool = False
+
+
 # Response model
 class AnalysisResponse(BaseModel):
     platforms: Dict[str, Any]
     overall: Dict[str, Any]
     duplicateAnalysis: Optional[Dict[str, Any]]
     aiInsights: Optional[Dict[str, Any]]
+    percentiles: Optional[Dict[str, Any]] = None
+    servedFrom: Optional[str] = None
+    ageSeconds: Optional[float] = None
+    stale: Optional[bool] = None
     timestamp: str
+    trace: Optional[Dict[str, Any]] = None
 
 
 # ============================================================================
@@ -100,12 +269,137 @@ async def health_check():
         "status": "healthy",
         "database": mongo_status,
         "supportedPlatforms": ["leetcode", "codeforces", "gfg"],
+        "upstreamPools": http_transport.stats(),
+        "rateLimits": http_transport.rate_limiter.stats(),
+        "writeQueue": analysis_writer.stats() if analysis_writer is not None else None,
+        "scheduler": refresh_scheduler.stats(),
+        "jobs": job_queue.stats(),
+        "rankIndex": rank_index.stats(),
+        "logging": logs.stats(),
+        **analyzer_service.stats(),
+        "problemMap": canonical_problem_map.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics for this worker process"""
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
+
+
+def validate_profiles(profiles: Dict[str, Any]):
+    """Raise 400 for an empty request or unsupported platforms"""
+    if not profiles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No profiles provided"
+        )
+    
+    # Validate platforms
+    supported_platforms = {'leetcode', 'codeforces', 'gfg'}
+    invalid_platforms = set(profiles.keys()) - supported_platforms
+    
+    if invalid_platforms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported platforms: {', '.join(invalid_platforms)}. Supported: {', '.join(supported_platforms)}"
+        )
+
+
+# Where each analyzed profile set stands among all of them
+rank_index = RankIndex(rank_store)
+
+
+# Profile-set hashes with a stale-while-revalidate refresh in progress
+refreshing_profiles: Dict[str, asyncio.Task] = {}
+
+
+async def run_analysis(profiles: Dict[str, Any], profile_hash: str) -> Dict:
+    """Scrape and analyze a profile set, then queue it for storage"""
+    analysis_result = await analyzer_service.analyze_multiple_platforms_async(profiles)
+    
+    # Queue for MongoDB; the response does not wait for the write
+    if analysis_writer is not None:
+        with tracing.span('db_write', mode='queued'):
+            await analysis_writer.submit(analysis_document(analysis_result, profile_hash))
+    
+    # Queued as well; the ranks update shortly after the response
+    rank_index.record(profile_hash, analysis_result)
+    return analysis_result
+
+
+# Keeps tracked profile sets warm; snapshots are stored like any analysis
+# Refreshes only pay off when their snapshots are stored and served
+# (MongoDB); without it they would just spend rate budget
+refresh_scheduler = RefreshScheduler(
+    tracked_store,
+    run_analysis,
+    enabled=analysis_writer is not None and ANALYSIS_FRESH_SECONDS > 0
+)
+
+
+def refresh_in_background(profiles: Dict[str, Any], profile_hash: str):
+    """Re-analyze a stale profile set once, without blocking the caller"""
+    if profile_hash in refreshing_profiles:
+        return
+    
+    task = asyncio.create_task(run_analysis(profiles, profile_hash))
+    refreshing_profiles[profile_hash] = task
+    task.add_done_callback(lambda _: refreshing_profiles.pop(profile_hash, None))
+
+
+async def read_through(profiles: Dict[str, Any], profile_hash: str) -> Optional[Dict]:
+    """
+    Stored analysis of the same profile set, if recent enough to serve
+    
+    Fresh results are returned as-is; stale ones (within the opt-in stale
+    window) are returned while a background refresh replaces them. Either
+    way the result is marked servedFrom="stored" with its age.
+    """
+    if async_db is None or ANALYSIS_FRESH_SECONDS <= 0:
+        return None
+    
+    try:
+        with tracing.span('db_read') as read_span:
+            stored = await find_recent_analysis(
+                async_db["analyses"], profile_hash, ANALYSIS_FRESH_SECONDS + ANALYSIS_STALE_SECONDS
+            )
+            read_span.set(hit=stored is not None)
+    except Exception as e:
+        log.warning("Read-through lookup failed", error=str(e))
+        return None
+    
+    if stored is None:
+        return None
+    
+    age = (datetime.now() - stored.pop("createdAt")).total_seconds()
+    stale = age > ANALYSIS_FRESH_SECONDS
+    if stale:
+        refresh_in_background(profiles, profile_hash)
+    return {**stored, "servedFrom": "stored", "ageSeconds": round(age, 1), "stale": stale}
+
+
+async def analyse_profile_set(profiles: Dict[str, Any], refresh: bool = False) -> Dict:
+    """Stored analysis when recent enough, otherwise a fresh one, with current percentile ranks"""
+    profile_hash = analyzer_service.profile_set_hash(profiles)
+    analysis = await read_through(profiles, profile_hash) if not refresh else None
+    
+    # Perform analysis (accounts are fetched concurrently off the event loop)
+    if analysis is None:
+        analysis = {**await run_analysis(profiles, profile_hash), "servedFrom": "live", "ageSeconds": 0.0, "stale": False}
+    
+    return {**analysis, "percentiles": rank_index.percentiles(analysis)}
+
+
 @app.post("/api/analyse", response_model=AnalysisResponse)
-async def analyze_profiles(request: AnalyseRequest):
+async def analyze_profiles(
+    request: AnalyseRequest,
+    refresh: bool = Query(False, description="Skip stored results and scrape again"),
+    trace: bool = Query(False, description="Include a per-stage timing breakdown"),
+    x_debug_trace: Optional[str] = Header(None)
+):
     """
     Analyze coding profiles from multiple platforms
     
@@ -118,55 +412,196 @@ async def analyze_profiles(request: AnalyseRequest):
     - Single username per platform: {"leetcode": "username"}
     - Multiple usernames per platform: {"leetcode": ["user1", "user2"]}
     - URLs or usernames
+    
+    Recent stored analyses of the same profile set are served from MongoDB
+    unless refresh=true; servedFrom and ageSeconds say which one you got.
+    
+    With trace=true (or an X-Debug-Trace: 1 header) the response carries the
+    request's spans: each account's cache outcome, upstream attempt, parse,
+    aggregation, insights and storage step.
     """
     try:
         profiles = request.profiles
         
-        if not profiles:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No profiles provided"
-            )
+        validate_profiles(profiles)
         
-        # Validate platforms
-        supported_platforms = {'leetcode', 'codeforces', 'gfg'}
-        invalid_platforms = set(profiles.keys()) - supported_platforms
+        log.info("Analyzing profiles", profiles=profiles, refresh=refresh, sample=True)
         
-        if invalid_platforms:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported platforms: {', '.join(invalid_platforms)}. Supported: {', '.join(supported_platforms)}"
-            )
-        
-        print(f"📊 Analyzing profiles: {profiles}")
-        
-        # Perform analysis
-        analysis_result = analyzer_service.analyze_multiple_platforms(profiles)
-        
-        # Save to MongoDB
-        if analyses_collection is not None:
-            try:
-                analysis_doc = {
-                    **analysis_result,
-                    "createdAt": datetime.now()
-                }
-                analyses_collection.insert_one(analysis_doc)
-                print("💾 Analysis saved to MongoDB")
-            except Exception as e:
-                print(f"⚠️ Failed to save to MongoDB: {e}")
+        if not (tracing.TRACING_ENABLED and (trace or x_debug_trace in ("1", "true"))):
+            return await analyse_profile_set(profiles, refresh)
         
-        return analysis_result
+        with tracing.start_trace("analyse", refresh=refresh) as request_trace:
+            analysis = await analyse_profile_set(profiles, refresh)
+        return {**analysis, "trace": request_trace.to_dict()}
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Analysis error: {str(e)}")
+        log.exception("Analysis failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
         )
 
 
+async def stream_cohort(cohort: List[AnalyseRequest], refresh: bool):
+    """
+    Yield one NDJSON line per profile set, in completion order
+    
+    COHORT_WORKERS workers pull indexes from a shared counter and hand each
+    finished analysis to a queue no larger than the pool, so at most that
+    many results are held at once: a slow client stalls the workers rather
+    than growing memory. Only the six numbers each analysis contributes to
+    the cohort summary (vectorized scoring) on the final line are kept.
+    """
+    results: asyncio.Queue = asyncio.Queue(maxsize=COHORT_WORKERS)
+    next_index = iter(range(len(cohort)))
+    scored_indexes = array('q')
+    scored_rows = array('d')
+    
+    async def worker():
+        for index in next_index:
+            try:
+                analysis = await analyse_profile_set(cohort[index].profiles, refresh)
+                line = {"index": index, "success": True, "analysis": analysis}
+                scored_indexes.append(index)
+                scored_rows.extend(cohort_row(analysis))
+            except Exception as e:
+                line = {"index": index, "success": False, "error": str(e)}
+            await results.put((line["success"], json.dumps(line, default=str) + "\n"))
+    
+    workers = [asyncio.create_task(worker()) for _ in range(min(COHORT_WORKERS, len(cohort)))]
+    failed = 0
+    try:
+        for _ in range(len(cohort)):
+            success, line = await results.get()
+            failed += not success
+            yield line
+        summary = cohort_summary(scored_indexes, scored_rows)
+        yield json.dumps({"done": True, "count": len(cohort), "failed": failed, "summary": summary}) + "\n"
+    finally:
+        # Client went away (or we are done): stop any remaining work
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+@app.post("/api/analyse/cohort")
+async def analyze_cohort(request: CohortRequest):
+    """
+    Analyze many profile sets, streaming results as NDJSON
+    
+    Each line is {"index", "success", "analysis" | "error"} for one entry of
+    `cohort`, written as soon as it finishes (not in request order); the
+    last line is {"done": true, "count", "failed", "summary"}, where summary
+    scores the successful entries as one cohort (score distribution, grades,
+    levels, and each entry's score and percentile within the cohort).
+    Entries share the profile cache, rate limits and stored-analysis
+    read-through.
+    """
+    cohort = request.cohort
+    if not cohort:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No profile sets provided"
+        )
+    if len(cohort) > COHORT_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cohort too large: {len(cohort)} profile sets (max {COHORT_MAX_SIZE})"
+        )
+    
+    for index, entry in enumerate(cohort):
+        try:
+            validate_profiles(entry.profiles)
+        except HTTPException as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"cohort[{index}]: {e.detail}"
+            )
+    
+    log.info("Analyzing cohort", size=len(cohort), refresh=request.refresh, sample=True)
+    
+    return StreamingResponse(
+        stream_cohort(cohort, request.refresh),
+        media_type="application/x-ndjson"
+    )
+
+
+# Runs /api/jobs submissions in the background
+job_queue = JobQueue(job_store, analyse_profile_set)
+
+
+@app.post("/api/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: JobRequest):
+    """
+    Queue an analysis job and return its id immediately
+    
+    Poll GET /api/jobs/{id} for status and the results finished so far.
+    Submitting an identical request while a matching job is queued,
+    running or recently done returns that job instead of a new one.
+    """
+    if (request.profiles is None) == (request.cohort is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either profiles or cohort"
+        )
+    
+    profile_sets = [request.profiles] if request.profiles is not None else [entry.profiles for entry in request.cohort]
+    if not profile_sets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No profile sets provided"
+        )
+    if len(profile_sets) > JOB_MAX_SETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many profile sets: {len(profile_sets)} (max {JOB_MAX_SETS})"
+        )
+    
+    lane = request.lane or (INTERACTIVE if len(profile_sets) == 1 else BULK)
+    if lane not in LANES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown lane: {lane}. Supported: {', '.join(LANES)}"
+        )
+    
+    for profiles in profile_sets:
+        validate_profiles(profiles)
+    
+    try:
+        job = await job_queue.submit(
+            profile_sets,
+            [analyzer_service.profile_set_hash(profiles) for profiles in profile_sets],
+            lane,
+            request.refresh
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue job: {str(e)}"
+        )
+    return job_view(job, include_results=False)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, progress and the results finished so far (by profile-set index)"""
+    try:
+        job = await job_queue.get(job_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch job: {str(e)}"
+        )
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or expired"
+        )
+    return job_view(job)
+
+
 @app.get("/api/platforms")
 async def get_supported_platforms():
     """Get list of supported platforms"""
@@ -195,22 +630,43 @@ async def get_supported_platforms():
 
 
 @app.get("/api/history")
-async def get_analysis_history(limit: int = 10):
-    """Get recent analysis history from MongoDB"""
-    if analyses_collection is None:
+async def get_analysis_history(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    platform: Optional[str] = None,
+    username: Optional[str] = None
+):
+    """
+    Get analysis history from MongoDB, newest first
+    
+    - limit: page size (capped at HISTORY_MAX_PAGE_SIZE)
+    - cursor: nextCursor from the previous page
+    - fields: comma-separated top-level fields to return (default: all but aiInsights)
+    - platform / username: only analyses including that account
+    """
+    if async_db is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Database not available"
         )
     
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    
     try:
-        analyses = list(
-            analyses_collection
-            .find({}, {"_id": 0})
-            .sort("createdAt", -1)
-            .limit(limit)
+        return await fetch_history(
+            async_db["analyses"],
+            limit=limit,
+            cursor=cursor,
+            fields=field_list,
+            platform=platform,
+            username=username
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-        return {"analyses": analyses, "count": len(analyses)}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -218,9 +674,84 @@ async def get_analysis_history(limit: int = 10):
         )
 
 
+def tracked_view(entry: Dict) -> Dict:
+    view = {key: value for key, value in entry.items() if key != "_id"}
+    view["profileHash"] = entry["_id"]
+    return view
+
+
+@app.post("/api/tracked", status_code=status.HTTP_201_CREATED)
+async def track_profiles(request: AnalyseRequest):
+    """
+    Track a profile set for background refreshes
+    
+    Tracked sets are re-analyzed periodically (within the scheduler's rate
+    budget), so /api/analyse for them is served from a fresh snapshot.
+    Registering the same set again is a no-op. Needs MongoDB, where the
+    refreshed snapshots are stored.
+    """
+    if not refresh_scheduler.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tracking is unavailable: refreshed snapshots need MongoDB"
+        )
+    
+    validate_profiles(request.profiles)
+    
+    profiles = analyzer_service.normalize_profiles(request.profiles)
+    if not profiles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No usernames provided"
+        )
+    
+    try:
+        entry = await refresh_scheduler.track(profiles, analyzer_service.profile_set_hash(profiles))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to track profiles: {str(e)}"
+        )
+    return tracked_view(entry)
+
+
+@app.get("/api/tracked")
+async def list_tracked_profiles(limit: int = 100):
+    """Tracked profile sets, next due first, with scheduler stats"""
+    limit = max(1, min(limit, TRACKED_LIST_MAX))
+    try:
+        entries = await tracked_store.list(limit)
+        total = await tracked_store.count()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list tracked profiles: {str(e)}"
+        )
+    return {
+        "tracked": [tracked_view(entry) for entry in entries],
+        "count": total,
+        "scheduler": refresh_scheduler.stats()
+    }
+
+
+@app.delete("/api/tracked/{profile_hash}")
+async def untrack_profiles(profile_hash: str):
+    """Stop refreshing a tracked profile set"""
+    if not await refresh_scheduler.untrack(profile_hash):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile set is not tracked"
+        )
+    return {"profileHash": profile_hash, "tracked": False}
+
+
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
+    # Endpoints raise 404 for missing resources (jobs, tracked sets): keep
+    # their detail, in the same shape as other HTTPExceptions
+    if request.scope.get("route") is not None:
+        return JSONResponse(status_code=404, content={"detail": getattr(exc, "detail", "Not Found")})
     return JSONResponse(
         status_code=404,
         content={
@@ -0,0 +1,80 @@
+"""
+Platform Analyser - Request Batching
+Micro-batching of per-user upstream lookups issued from concurrent threads
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable
+
+
+class MicroBatcher:
+    """
+    Groups single-key lookups into batch calls
+
+    The first caller opens a batch and waits up to `window` seconds for
+    others to join (or until `max_batch_size` keys are queued), then resolves
+    every key with one `batch_fn` call. `batch_fn` receives the list of keys
+    and returns {key: result}; an Exception as a value fails only that key.
+    """
+
+    def __init__(self, batch_fn: Callable[[Iterable[Any]], Dict[Any, Any]], max_batch_size: int, window: float):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._lock = threading.Lock()
+        self._batch = None
+        self._counters = {'batches': 0, 'keys': 0}
+
+    def get(self, key: Any) -> Any:
+        """Resolve one key, blocking until its batch completes"""
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = {'futures': {}, 'full': threading.Event()}
+                self._batch = batch
+
+            future = batch['futures'].get(key)
+            if future is None:
+                future = Future()
+                batch['futures'][key] = future
+
+            if len(batch['futures']) >= self.max_batch_size:
+                # Close this batch now; the next caller starts a new one
+                self._batch = None
+                batch['full'].set()
+
+        if leader:
+            batch['full'].wait(self.window)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._run(batch['futures'])
+
+        return future.result()
+
+    def _run(self, futures: Dict[Any, Future]):
+        with self._lock:
+            self._counters['batches'] += 1
+            self._counters['keys'] += len(futures)
+
+        try:
+            results = self.batch_fn(list(futures))
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+            return
+
+        for key, future in futures.items():
+            result = results.get(key, KeyError(key))
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters['avgBatchSize'] = round(counters['keys'] / counters['batches'], 2) if counters['batches'] else 0.0
+        return counters
@@ -0,0 +1,200 @@
+"""
+Platform Analyser - Analysis Benchmark
+Load-tests /api/analyse offline against the replay server
+
+Starts benchmarks/replay_server.py in a subprocess, points the backend's
+upstream calls at it (UPSTREAM_REPLAY_URL) and drives /api/analyse
+in-process at each concurrency level and account count. Reports p50/p95/
+p99 latency, throughput, error count and peak RSS per scenario. Every
+request uses fresh usernames, so the profile cache never hides the
+pipeline's cost.
+
+Usage: python benchmarks/bench_analyse.py [--concurrency 1,8,32]
+       [--accounts 1,3,6] [--requests 60] [--latency-ms 80] [--jitter-ms 40]
+       [--error-rate 0] [--throttle-rate 0] [--rate-limits] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+PLATFORMS = ['leetcode', 'codeforces', 'gfg']
+
+
+def parse_levels(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS mark (Linux); a no-op elsewhere"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mib() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and never resets
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_set(scenario: str, request_index: int, accounts: int) -> Dict[str, List[str]]:
+    """`accounts` fresh usernames spread round-robin over the platforms"""
+    profiles: Dict[str, List[str]] = {}
+    for k in range(accounts):
+        platform = PLATFORMS[k % len(PLATFORMS)]
+        profiles.setdefault(platform, []).append(f"{scenario}r{request_index}a{k}")
+    return profiles
+
+
+def start_replay_server(args) -> subprocess.Popen:
+    command = [
+        sys.executable, os.path.join(BENCH_DIR, 'replay_server.py'),
+        '--port', str(args.port),
+        '--latency-ms', str(args.latency_ms),
+        '--jitter-ms', str(args.jitter_ms),
+        '--error-rate', str(args.error_rate),
+        '--throttle-rate', str(args.throttle_rate),
+        '--seed', '1'
+    ]
+    return subprocess.Popen(command)
+
+
+def wait_for_server(url: str, timeout: float = 15):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Replay server did not start at {url}")
+
+
+async def run_scenario(client, scenario: str, accounts: int, concurrency: int, requests: int) -> Dict:
+    limit = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(request_index: int):
+        nonlocal errors
+        body = {'profiles': profile_set(scenario, request_index, accounts)}
+        async with limit:
+            start = time.perf_counter()
+            response = await client.post('/api/analyse', params={'refresh': 'true'}, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors += 1
+        elif not all(p.get('success') for p in response.json()['platforms'].values()):
+            errors += 1
+
+    reset_peak_rss()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'accounts': accounts,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'p50Ms': round(percentile(latencies, 50), 1),
+        'p95Ms': round(percentile(latencies, 95), 1),
+        'p99Ms': round(percentile(latencies, 99), 1),
+        'throughputRps': round(requests / elapsed, 2),
+        'peakRssMiB': round(peak_rss_mib(), 1)
+    }
+
+
+async def run(args) -> List[Dict]:
+    import httpx
+    import app as backend
+
+    results = []
+    transport = httpx.ASGITransport(app=backend.app)
+    async with backend.app.router.lifespan_context(backend.app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            # Warm-up: opens upstream pools and loads lazily built state
+            await run_scenario(client, 'warm', 1, 1, 3)
+
+            for accounts in args.accounts:
+                for concurrency in args.concurrency:
+                    scenario = f"a{accounts}c{concurrency}"
+                    result = await run_scenario(client, scenario, accounts, concurrency, args.requests)
+                    results.append(result)
+                    print(
+                        f"accounts={accounts:<3} concurrency={concurrency:<4} "
+                        f"p50={result['p50Ms']:8.1f} ms  p95={result['p95Ms']:8.1f} ms  "
+                        f"p99={result['p99Ms']:8.1f} ms  {result['throughputRps']:7.2f} req/s  "
+                        f"errors={result['errors']:<3} peak RSS={result['peakRssMiB']:.0f} MiB",
+                        flush=True
+                    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /api/analyse benchmark")
+    parser.add_argument('--concurrency', type=parse_levels, default=[1, 8, 32])
+    parser.add_argument('--accounts', type=parse_levels, default=[1, 3, 6])
+    parser.add_argument('--requests', type=int, default=60, help="requests per scenario")
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--jitter-ms', type=float, default=40)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate-limits', action='store_true', help="keep the production upstream rate limits")
+    parser.add_argument('--mongo-uri', default='mongodb://', help="MongoDB to use (default: none)")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    # Configure the backend before it is imported
+    os.environ['UPSTREAM_REPLAY_URL'] = f"http://127.0.0.1:{args.port}"
+    os.environ['MONGODB_URI'] = args.mongo_uri
+    if not args.rate_limits:
+        for platform in ('LEETCODE', 'CODEFORCES', 'GFG'):
+            os.environ[f'{platform}_RATE_PER_SECOND'] = '1000000'
+            os.environ[f'{platform}_RATE_BURST'] = '1000000'
+
+    server = start_replay_server(args)
+    try:
+        wait_for_server(f"http://127.0.0.1:{args.port}/_replay/stats")
+        results = asyncio.run(run(args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
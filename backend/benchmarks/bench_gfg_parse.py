@@ -0,0 +1,77 @@
+"""
+Platform Analyser - GFG Parse Benchmark
+Compares the full-tree and targeted GFG profile parsers on saved pages
+
+Usage: python benchmarks/bench_gfg_parse.py [--repeat N]
+
+Fixtures are reconstructed profile pages (same markup classes and embedded
+state layout as the live site, synthetic data): one with the Next.js
+__NEXT_DATA__ state and one rendered-only page.
+
+Peak memory is measured with tracemalloc, so it covers Python allocations
+only; lxml's C-side tree is not included.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gfg_parser import LXML_AVAILABLE, count_from_elements, estimated_stats, parse_profile, parse_profile_tree  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURES = ['gfg_profile_next.html', 'gfg_profile_legacy.html']
+
+
+def strained(html: str):
+    return {'stats': estimated_stats(count_from_elements(html)), 'problemIds': []}
+
+
+PATHS = [
+    ('full tree (html.parser)', parse_profile_tree),
+    ('targeted elements (lxml)' if LXML_AVAILABLE else 'targeted elements (SoupStrainer)', strained),
+    ('fast path', parse_profile)
+]
+
+
+def measure(fn, html: str, repeat: int):
+    fn(html)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    per_call_ms = (time.perf_counter() - start) / repeat * 1000
+
+    tracemalloc.start()
+    result = fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call_ms, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for name in FIXTURES:
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            html = f.read()
+
+        print(f"\n{name} ({len(html) / 1024:.0f} KiB)")
+        baseline = None
+        for label, fn in PATHS:
+            per_call_ms, peak, result = measure(fn, html, args.repeat)
+            baseline = baseline or (per_call_ms, peak)
+            print(
+                f"  {label:<32} {per_call_ms:8.2f} ms  {peak / 1024:8.0f} KiB peak  "
+                f"x{baseline[0] / per_call_ms:5.1f} faster  total={result['stats']['total']} "
+                f"slugs={len(result['problemIds'])}"
+            )
+
+
+if __name__ == '__main__':
+    main()
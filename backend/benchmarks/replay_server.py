@@ -0,0 +1,171 @@
+"""
+Platform Analyser - Replay Server
+Local stand-in for LeetCode, CodeForces and GFG serving recorded responses
+
+Point the backend at it with UPSTREAM_REPLAY_URL=http://127.0.0.1:<port>;
+every upstream call is then answered from fixtures/replay with the
+configured latency, jitter and injected errors. Any username resolves to
+the recorded profile, except names starting with "missing", which every
+platform reports as unknown.
+
+Usage: python benchmarks/replay_server.py [--port 8765] [--latency-ms 80]
+       [--jitter-ms 40] [--error-rate 0.0] [--throttle-rate 0.0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+REPLAY_DIR = os.path.join(FIXTURES_DIR, 'replay')
+
+MISSING_PREFIX = 'missing'
+
+
+def _load(name: str) -> str:
+    with open(os.path.join(REPLAY_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def _render(template: str, username: str) -> str:
+    """Fixture text with {username} replaced (JSON-escaped)"""
+    return template.replace('{username}', json.dumps(username)[1:-1])
+
+
+def build_replay_app(
+    latency_ms: float = 80,
+    jitter_ms: float = 40,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    seed: int = None
+) -> FastAPI:
+    """
+    Replay app: recorded upstream responses plus fault injection
+
+    Each upstream request waits latency_ms + uniform(0, jitter_ms), then
+    fails with 503 at error_rate or 429 (Retry-After: 1) at throttle_rate.
+    """
+    rng = random.Random(seed)
+    fixtures = {
+        'leetcode_user': _load('leetcode_user.json'),
+        'leetcode_recent': json.loads(_load('leetcode_recent.json')),
+        'codeforces_user_info': _load('codeforces_user_info.json'),
+        'codeforces_submissions': json.loads(_render(_load('codeforces_user_status.json'), ''))['result'],
+        'gfg_user_stats': _load('gfg_user_stats.json'),
+        'gfg_submissions': _load('gfg_submissions.json'),
+        'gfg_profile': _load(os.path.join('..', 'gfg_profile_next.html'))
+    }
+    counters: Dict[str, Counter] = {}
+
+    app = FastAPI(title="Platform Analyser Replay Server")
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith('/_replay'):
+            return await call_next(request)
+
+        upstream = request.headers.get('x-upstream-host', 'unknown')
+        await asyncio.sleep((latency_ms + rng.uniform(0, jitter_ms)) / 1000)
+
+        roll = rng.random()
+        if roll < error_rate:
+            response = JSONResponse({'error': 'injected failure'}, status_code=503)
+        elif roll < error_rate + throttle_rate:
+            response = JSONResponse({'error': 'injected throttle'}, status_code=429, headers={'Retry-After': '1'})
+        else:
+            response = await call_next(request)
+
+        counters.setdefault(upstream, Counter())[str(response.status_code)] += 1
+        return response
+
+    @app.get("/_replay/stats")
+    async def replay_stats():
+        return {host: dict(codes) for host, codes in counters.items()}
+
+    # LeetCode: aliased batch query, u{i} / u{i}_recent per username variable
+    @app.post("/graphql")
+    async def leetcode_graphql(request: Request):
+        variables = (await request.json()).get('variables') or {}
+        data = {}
+        for name, username in variables.items():
+            if not (name.startswith('u') and name[1:].isdigit()):
+                continue
+            if username.lower().startswith(MISSING_PREFIX):
+                data[name] = None
+                data[f'{name}_recent'] = None
+            else:
+                data[name] = json.loads(_render(fixtures['leetcode_user'], username))
+                data[f'{name}_recent'] = fixtures['leetcode_recent'][:variables.get('limit', 20)]
+        return {'data': data}
+
+    # CodeForces: user.info rejects the whole call for an unknown handle
+    @app.get("/api/user.info")
+    async def codeforces_user_info(handles: str):
+        result = []
+        for handle in handles.split(';'):
+            if handle.lower().startswith(MISSING_PREFIX):
+                return JSONResponse(
+                    {'status': 'FAILED', 'comment': f'handles: User with handle {handle} not found'},
+                    status_code=400
+                )
+            result.append(json.loads(_render(fixtures['codeforces_user_info'], handle)))
+        return {'status': 'OK', 'result': result}
+
+    @app.get("/api/user.status")
+    async def codeforces_user_status(handle: str, count: int = 100, start: int = Query(1, alias='from')):
+        if handle.lower().startswith(MISSING_PREFIX):
+            return JSONResponse(
+                {'status': 'FAILED', 'comment': f'handle: User with handle {handle} not found'},
+                status_code=400
+            )
+        return {'status': 'OK', 'result': fixtures['codeforces_submissions'][start - 1:start - 1 + count]}
+
+    # GFG: stats API, solved-problems API and the profile page fallback
+    @app.get("/api/vr/user-stats")
+    async def gfg_user_stats(userName: str):
+        if userName.lower().startswith(MISSING_PREFIX):
+            return {'results': None}
+        return Response(_render(fixtures['gfg_user_stats'], userName), media_type='application/json')
+
+    @app.post("/api/v1/user/problems/submissions/")
+    async def gfg_submissions(request: Request):
+        handle = (await request.json()).get('handle', '')
+        if handle.lower().startswith(MISSING_PREFIX):
+            return {'status': 'error', 'result': {}}
+        return Response(fixtures['gfg_submissions'], media_type='application/json')
+
+    @app.get("/user/{username}/")
+    async def gfg_profile(username: str):
+        if username.lower().startswith(MISSING_PREFIX):
+            return HTMLResponse('<html><body>Not found</body></html>', status_code=404)
+        return HTMLResponse(fixtures['gfg_profile'])
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay server for offline benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--jitter-ms', type=float, default=40)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    app = build_replay_app(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
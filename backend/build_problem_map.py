@@ -0,0 +1,86 @@
+"""
+Platform Analyser - Problem Map Builder
+Compiles data/problem_map.csv into the versioned lookup table loaded at startup
+
+Usage: python build_problem_map.py [--source data/problem_map.csv] [--output data/problem_map.json]
+"""
+
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Dict, List
+
+SUPPORTED_PLATFORMS = {'leetcode', 'codeforces', 'gfg'}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(BASE_DIR, "data", "problem_map.csv")
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "data", "problem_map.json")
+
+
+def build_table(rows: List[Dict[str, str]], version: int) -> Dict:
+    """
+    Build the lookup table from (canonical_id, platform, problem_id) rows
+
+    Canonical ids are numbered in sorted order; each platform maps its own
+    problem ids to those numbers. A platform id may belong to one canonical
+    problem only.
+    """
+    canonical_ids = sorted({row['canonical_id'].strip() for row in rows})
+    canonical_index = {cid: i for i, cid in enumerate(canonical_ids)}
+
+    entries: Dict[str, Dict[str, int]] = {}
+    for line, row in enumerate(rows, start=2):
+        platform = row['platform'].strip().lower()
+        problem_id = row['problem_id'].strip()
+        canonical = canonical_index[row['canonical_id'].strip()]
+
+        if platform not in SUPPORTED_PLATFORMS:
+            raise ValueError(f"line {line}: unsupported platform '{platform}'")
+
+        platform_entries = entries.setdefault(platform, {})
+        if platform_entries.get(problem_id, canonical) != canonical:
+            raise ValueError(f"line {line}: {platform}:{problem_id} mapped to two canonical problems")
+        platform_entries[problem_id] = canonical
+
+    return {
+        'version': version,
+        'builtAt': datetime.now().isoformat(),
+        'canonical': canonical_ids,
+        'entries': {
+            platform: sorted(mapping.items())
+            for platform, mapping in sorted(entries.items())
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cross-platform problem lookup table")
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--version", type=int, help="Table version (default: previous version + 1)")
+    args = parser.parse_args()
+
+    with open(args.source, newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row.get('canonical_id')]
+
+    version = args.version
+    if version is None:
+        try:
+            with open(args.output) as f:
+                version = json.load(f).get('version', 0) + 1
+        except (OSError, ValueError):
+            version = 1
+
+    table = build_table(rows, version)
+    with open(args.output, 'w') as f:
+        json.dump(table, f, indent=1)
+        f.write("\n")
+
+    mapped = sum(len(ids) for ids in table['entries'].values())
+    print(f"✅ Wrote problem map v{version}: {len(table['canonical'])} canonical problems, {mapped} platform ids")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Platform Analyser - Result Cache
+Bounded TTL + LRU cache for per-user platform fetches
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+# Seconds a successful fetch stays fresh, per platform
+PLATFORM_TTLS = {
+    'leetcode': float(os.getenv("CACHE_TTL_LEETCODE", "300")),
+    'codeforces': float(os.getenv("CACHE_TTL_CODEFORCES", "300")),
+    'gfg': float(os.getenv("CACHE_TTL_GFG", "600"))
+}
+
+# Seconds a "user not found" answer is remembered
+NEGATIVE_TTL = float(os.getenv("CACHE_TTL_NOT_FOUND", "60"))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class ProfileCache:
+    """
+    Thread-safe cache of scraper results keyed by (platform, normalized username)
+
+    Entries expire after their platform TTL and the least recently used ones
+    are evicted once either the entry count or the approximate byte size
+    exceeds its limit. Only successful and "not found" results are stored.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        negative_ttl: float = NEGATIVE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES
+    ):
+        self.ttls = ttls if ttls is not None else PLATFORM_TTLS
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, data)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, Dict]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'negativeHits': 0, 'evictions': 0, 'expirations': 0}
+
+    @staticmethod
+    def make_key(platform: str, username: str) -> Tuple[str, str]:
+        return platform, username.strip().lower()
+
+    def get(self, platform: str, username: str) -> Optional[Dict]:
+        """Return a copy of the cached result, or None on miss/expiry"""
+        key = self.make_key(platform, username)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+
+            expires_at, size, data = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            if data.get('notFound'):
+                self._counters['negativeHits'] += 1
+            return dict(data)
+
+    def contains(self, platform: str, username: str) -> bool:
+        """Whether a fresh entry exists, without touching counters or recency"""
+        with self._lock:
+            entry = self._entries.get(self.make_key(platform, username))
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, platform: str, username: str, data: Dict):
+        """Store a scraper result; transient failures are not cached"""
+        if data.get('success'):
+            ttl = self.ttls.get(platform, 0)
+        elif data.get('notFound'):
+            ttl = self.negative_ttl
+        else:
+            return
+
+        if ttl <= 0:
+            return
+
+        size = len(json.dumps(data, default=str))
+        if size > self.max_bytes:
+            return
+
+        key = self.make_key(platform, username)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, dict(data))
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, platform: str, username: str):
+        with self._lock:
+            key = self.make_key(platform, username)
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Tuple[str, str]):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+            size = self._bytes
+
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'entries': entries,
+            'bytes': size,
+            'maxEntries': self.max_entries,
+            'maxBytes': self.max_bytes,
+            'hitRate': round(counters['hits'] / lookups, 3) if lookups else 0.0
+        }
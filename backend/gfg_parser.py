@@ -0,0 +1,148 @@
+"""
+Platform Analyser - GFG Profile Parser
+Targeted extraction of profile stats from GeeksforGeeks profile pages
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+NEXT_DATA_OPEN = '<script id="__NEXT_DATA__"'
+SCRIPT_CLOSE = '</script>'
+
+COUNT_CLASS = re.compile('problem|score|solved', re.I)
+NUMBER = re.compile(r'\d+')
+
+# Page difficulty buckets -> our easy/medium/hard (same mapping as the API path)
+DIFFICULTY_BUCKETS = {
+    'school': 'easy',
+    'basic': 'medium',
+    'easy': 'medium',
+    'medium': 'medium',
+    'hard': 'hard'
+}
+
+
+def estimated_stats(total: int) -> Dict[str, int]:
+    """Typical GFG distribution when only the total is known"""
+    return {
+        'easy': int(total * 0.45),
+        'medium': int(total * 0.40),
+        'hard': int(total * 0.15),
+        'total': total
+    }
+
+
+def _next_data(html: str) -> Optional[Dict]:
+    """The page's embedded Next.js state, located by string search (no HTML parse)"""
+    start = html.find(NEXT_DATA_OPEN)
+    if start < 0:
+        return None
+    start = html.find('>', start) + 1
+    end = html.find(SCRIPT_CLOSE, start)
+    if start <= 0 or end < 0:
+        return None
+    try:
+        return json.loads(html[start:end])
+    except ValueError:
+        return None
+
+
+def parse_next_data(html: str) -> Optional[Dict]:
+    """
+    Profile fields from the embedded page state, or None if it is missing
+
+    The state carries the real per-difficulty solved lists, so stats and
+    problem slugs are exact rather than estimated.
+    """
+    data = _next_data(html)
+    page_props = ((data or {}).get('props') or {}).get('pageProps') or {}
+    user = page_props.get('userInfo')
+    if not isinstance(user, dict):
+        return None
+
+    stats = {'easy': 0, 'medium': 0, 'hard': 0}
+    slugs: List[str] = []
+    submissions = page_props.get('userSubmissionsInfo')
+    if isinstance(submissions, dict) and submissions:
+        for difficulty, problems in submissions.items():
+            bucket = DIFFICULTY_BUCKETS.get(str(difficulty).lower())
+            if bucket is None or not isinstance(problems, dict):
+                continue
+            stats[bucket] += len(problems)
+            slugs.extend(p['slug'] for p in problems.values() if isinstance(p, dict) and p.get('slug'))
+        stats['total'] = int(user.get('total_problems_solved') or sum(stats.values()))
+    else:
+        stats = estimated_stats(int(user.get('total_problems_solved') or 0))
+
+    return {
+        'name': user.get('name'),
+        'avatar': user.get('profile_image_url', ''),
+        'institution': user.get('institute_name', ''),
+        'score': user.get('score', 0),
+        'stats': stats,
+        'problemIds': list(dict.fromkeys(slugs))
+    }
+
+
+def _max_leading_number(elements: Any) -> int:
+    total = 0
+    for elem in elements:
+        match = NUMBER.search(elem.get_text())
+        if match:
+            total = max(total, int(match.group()))
+    return total
+
+
+def count_from_elements(html: str) -> int:
+    """
+    Largest leading number in problem/score/solved elements
+
+    With lxml the page is parsed in C and only div/span elements are
+    visited; without it, SoupStrainer builds just the matching elements
+    instead of the whole BeautifulSoup tree.
+    """
+    if LXML_AVAILABLE:
+        try:
+            root = lxml.html.fromstring(html)
+        except (ValueError, lxml.etree.ParserError):
+            return 0
+        total = 0
+        for elem in root.iter('div', 'span'):
+            if COUNT_CLASS.search(elem.get('class', '')):
+                match = NUMBER.search(elem.text_content())
+                if match:
+                    total = max(total, int(match.group()))
+        return total
+
+    strainer = SoupStrainer(['div', 'span'], attrs={'class': COUNT_CLASS})
+    soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+    return _max_leading_number(soup.find_all(['div', 'span'], class_=COUNT_CLASS))
+
+
+def parse_profile(html: str) -> Dict:
+    """Profile fields from a profile page: embedded state first, then targeted elements"""
+    parsed = parse_next_data(html)
+    if parsed is not None:
+        return parsed
+    return {'stats': estimated_stats(count_from_elements(html)), 'problemIds': []}
+
+
+def parse_profile_tree(html: str) -> Dict:
+    """Full-tree html.parser walk; the original fallback, kept as the benchmark baseline"""
+    soup = BeautifulSoup(html, 'html.parser')
+    total = 0
+    for elem in soup.find_all(['div', 'span'], class_=COUNT_CLASS):
+        numbers = re.findall(r'\d+', elem.get_text())
+        if numbers:
+            total = max(total, int(numbers[0]))
+    return {'stats': estimated_stats(total), 'problemIds': []}
@@ -0,0 +1,279 @@
+"""
+Platform Analyser - HTTP Transport
+Shared connection pools used by every scraper, one per upstream host
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+import tracing
+from ratelimit import RateLimiter, build_backend
+from resilience import (
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    RetryableHTTPError,
+    retry_policy
+)
+
+# HTTP/2 needs the optional h2 package (installed via httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "15"))
+
+# Send every upstream call to this origin instead (the offline replay server
+# in benchmarks/replay_server.py); unset in production
+UPSTREAM_REPLAY_URL = os.getenv("UPSTREAM_REPLAY_URL")
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Pool settings per upstream host. HTTP/2 is only offered; hosts that do not
+# negotiate it over ALPN transparently fall back to HTTP/1.1.
+HOST_POOLS = {
+    'leetcode.com': {
+        'max_connections': int(os.getenv("LEETCODE_POOL_SIZE", "20")),
+        'keepalive_expiry': float(os.getenv("LEETCODE_KEEPALIVE_SECONDS", "60")),
+        'http2': True
+    },
+    'codeforces.com': {
+        'max_connections': int(os.getenv("CODEFORCES_POOL_SIZE", "10")),
+        'keepalive_expiry': float(os.getenv("CODEFORCES_KEEPALIVE_SECONDS", "60")),
+        'http2': True
+    },
+    'practiceapi.geeksforgeeks.org': {
+        'max_connections': int(os.getenv("GFG_POOL_SIZE", "20")),
+        'keepalive_expiry': float(os.getenv("GFG_KEEPALIVE_SECONDS", "30")),
+        'http2': True
+    },
+    'www.geeksforgeeks.org': {
+        'max_connections': int(os.getenv("GFG_POOL_SIZE", "20")),
+        'keepalive_expiry': float(os.getenv("GFG_KEEPALIVE_SECONDS", "30")),
+        'http2': True
+    }
+}
+
+# Used for any host not listed above
+DEFAULT_POOL = {
+    'max_connections': 10,
+    'keepalive_expiry': 30.0,
+    'http2': False
+}
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Redirects requests to a replay server, keeping path and query
+
+    The original host travels in the X-Upstream-Host header so the server
+    can answer as that upstream. Pooling, retries, breakers and rate limits
+    still apply per original host.
+    """
+
+    def __init__(self, replay_url: str, limits: httpx.Limits):
+        origin = httpx.URL(replay_url)
+        self.scheme = origin.scheme
+        self.host = origin.host
+        self.port = origin.port
+        self._transport = httpx.HTTPTransport(limits=limits)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.headers['X-Upstream-Host'] = request.url.host
+        request.url = request.url.copy_with(scheme=self.scheme, host=self.host, port=self.port)
+        request.headers['Host'] = request.url.netloc.decode()
+        return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+
+class HTTPTransport:
+    """
+    Thread-safe registry of pooled httpx clients keyed by host
+
+    Pools are opened on start() (or lazily on first use) and keep connections
+    alive between analyses, so repeat calls skip the TCP/TLS handshake.
+    Every call goes through the host's circuit breaker and is retried on
+    timeouts, connection errors, 429 and 5xx responses. Each attempt first
+    takes a token from the host's rate limiter.
+    """
+
+    def __init__(
+        self,
+        pools: Optional[Dict[str, Dict]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        rate_limiter: Optional[RateLimiter] = None,
+        replay_url: Optional[str] = UPSTREAM_REPLAY_URL
+    ):
+        self.pools = pools if pools is not None else HOST_POOLS
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.replay_url = replay_url
+        self._clients: Dict[str, httpx.Client] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Open a pool for every configured host"""
+        for host in self.pools:
+            self._client_for_host(host)
+
+    def close(self):
+        """Close all pools; they are reopened lazily if used again"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.close()
+
+    def _client_for_host(self, host: str) -> httpx.Client:
+        client = self._clients.get(host)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                config = {**DEFAULT_POOL, **self.pools.get(host, {})}
+                limits = httpx.Limits(
+                    max_connections=config['max_connections'],
+                    max_keepalive_connections=config['max_connections'],
+                    keepalive_expiry=config['keepalive_expiry']
+                )
+                client = httpx.Client(
+                    http2=config['http2'] and HTTP2_AVAILABLE,
+                    limits=limits,
+                    transport=ReplayTransport(self.replay_url, limits) if self.replay_url else None,
+                    timeout=self.timeout,
+                    headers=DEFAULT_HEADERS,
+                    follow_redirects=True,
+                    event_hooks={'request': [self._track_connections(host)]}
+                )
+                self._clients[host] = client
+                self._stats.setdefault(host, {'requests': 0, 'newConnections': 0, 'retries': 0, 'failures': 0})
+                self._breakers.setdefault(host, CircuitBreaker(host))
+        return client
+
+    def _track_connections(self, host: str):
+        """Request hook counting requests and freshly opened connections"""
+        stats_lock = self._lock
+
+        def trace(event_name: str, info: Dict):
+            if event_name == 'connection.connect_tcp.complete':
+                with stats_lock:
+                    self._stats[host]['newConnections'] += 1
+
+        def hook(request: httpx.Request):
+            with stats_lock:
+                self._stats[host]['requests'] += 1
+            request.extensions['trace'] = trace
+
+        return hook
+
+    def client_for(self, url: str) -> httpx.Client:
+        """Pooled client for the URL's host"""
+        return self._client_for_host(urlsplit(url).hostname or '')
+
+    def _count(self, host: str, counter: str):
+        with self._lock:
+            self._stats[host][counter] += 1
+
+    def _send(self, method: str, url: str, stream: bool, **kwargs) -> httpx.Response:
+        """Send through the host's breaker and retry policy"""
+        host = urlsplit(url).hostname or ''
+        client = self._client_for_host(host)
+        breaker = self._breakers[host]
+
+        def attempt() -> httpx.Response:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(host)
+            response = self._timed_send(host, client, client.build_request(method, url, **kwargs), stream)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                response.close()
+                raise RetryableHTTPError(response)
+            return response
+
+        breaker.before_call()
+        try:
+            response = self._with_retries(host, attempt)
+        except (httpx.TransportError, RetryableHTTPError):
+            self._count(host, 'failures')
+            breaker.record_failure()
+            raise
+        except Exception:
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return response
+
+    def _timed_send(self, host: str, client: httpx.Client, request: httpx.Request, stream: bool) -> httpx.Response:
+        """One attempt, recorded as network time (until headers when streaming)"""
+        in_flight = metrics.UPSTREAM_REQUESTS_IN_FLIGHT.labels(host)
+        in_flight.inc()
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = client.send(request, stream=stream)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            metrics.add_network_time(elapsed)
+            metrics.UPSTREAM_REQUEST_SECONDS.labels(host).observe(elapsed)
+            metrics.UPSTREAM_RESPONSES.labels(host, status).inc()
+            tracing.record('upstream', start, host=host, method=request.method, status=status)
+
+    def _with_retries(self, host: str, attempt: Callable[[], httpx.Response]) -> httpx.Response:
+        for retry_attempt in retry_policy(on_retry=lambda state: self._count(host, 'retries')):
+            # Traced attempts include the rate limiter wait; the upstream span inside is the send alone
+            with retry_attempt, tracing.span('attempt', host=host, number=retry_attempt.retry_state.attempt_number):
+                return attempt()
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return self._send(method, url, stream=False, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs):
+        """Context manager yielding a response whose body is read incrementally"""
+        response = self._send(method, url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host request and connection counters with reuse ratio"""
+        with self._lock:
+            snapshot = {host: dict(counts) for host, counts in self._stats.items()}
+
+        for host, counts in snapshot.items():
+            requests_made = counts['requests']
+            reused = max(requests_made - counts['newConnections'], 0)
+            counts['connectionReuseRatio'] = round(reused / requests_made, 3) if requests_made else 0.0
+            counts['circuit'] = self._breakers[host].stats()
+        return snapshot
+
+
+# Singleton instance
+http_transport = HTTPTransport(rate_limiter=RateLimiter(build_backend()))
@@ -0,0 +1,399 @@
+"""
+Platform Analyser - Job Queue
+Asynchronous analysis jobs with deduplication, priority lanes and expiry
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson.codec_options import CodecOptions
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from logs import get_logger
+from persistence import ANALYSIS_FRESH_SECONDS
+
+
+log = get_logger("jobs")
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Workers that may run bulk jobs at the same time; the rest stay free for
+# interactive jobs
+JOB_BULK_WORKERS = int(os.getenv("JOB_BULK_WORKERS", "1"))
+# Profile sets analyzed concurrently within one job
+JOB_SET_CONCURRENCY = int(os.getenv("JOB_SET_CONCURRENCY", "4"))
+JOB_MAX_SETS = int(os.getenv("JOB_MAX_SETS", "200"))
+# Finished jobs (and their results) are kept this long
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+# A finished job answers identical resubmissions only while its results are
+# as fresh as a stored analysis would be; refresh jobs never reuse one
+JOB_REUSE_DONE_SECONDS = float(os.getenv("JOB_REUSE_DONE_SECONDS", str(ANALYSIS_FRESH_SECONDS)))
+# A running job whose worker stops renewing its lease is picked up again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+# How often idle workers look for jobs submitted by other processes
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+LANES = (INTERACTIVE, BULK)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def job_dedup_key(profile_hashes: List[str], refresh: bool) -> str:
+    """Identical requests (same profile sets, same refresh flag) share a key"""
+    raw = json.dumps({'sets': profile_hashes, 'refresh': refresh})
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LocalJobStore:
+    """Jobs in process memory; only this worker process runs them"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+
+    async def insert(self, job: Dict):
+        self._jobs[job['_id']] = _copy_job(job)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return _copy_job(job) if job is not None else None
+
+    async def find_reusable(self, dedup_key: str, now: datetime, done_since: Optional[datetime]) -> Optional[Dict]:
+        for job in self._jobs.values():
+            if job['dedupKey'] == dedup_key and _reusable(job, now, done_since):
+                return _copy_job(job)
+        return None
+
+    async def claim(self, lane: str, now: datetime, lease_until: datetime) -> Optional[Dict]:
+        """Oldest queued job of the lane (or one whose worker lost its lease)"""
+        candidates = [
+            job for job in self._jobs.values()
+            if job['lane'] == lane and (
+                job['status'] == QUEUED or (job['status'] == RUNNING and job['leaseUntil'] <= now)
+            )
+        ]
+        if not candidates:
+            return None
+        job = min(candidates, key=lambda j: j['createdAt'])
+        job.update({'status': RUNNING, 'leaseUntil': lease_until, 'startedAt': job['startedAt'] or now})
+        return _copy_job(job)
+
+    async def record_result(self, job_id: str, index: int, result: Dict, lease_until: datetime):
+        job = self._jobs.get(job_id)
+        # A worker that lost its lease may finish a set the new holder already recorded
+        if job is not None and str(index) not in job['results']:
+            job['results'][str(index)] = result
+            job['completed'] += 1
+            job['failed'] += not result['success']
+            job['leaseUntil'] = lease_until
+
+    async def finish(self, job_id: str, update: Dict):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(update)
+
+    async def purge(self, now: datetime) -> int:
+        expired = [job_id for job_id, job in self._jobs.items() if _expired(job, now)]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+def _copy_job(job: Dict) -> Dict:
+    return {**job, 'results': dict(job['results'])}
+
+
+def _expired(job: Dict, now: datetime) -> bool:
+    return job['expiresAt'] is not None and job['expiresAt'] <= now
+
+
+def _reusable(job: Dict, now: datetime, done_since: Optional[datetime]) -> bool:
+    if job['status'] in (QUEUED, RUNNING):
+        return not _expired(job, now)
+    return job['status'] == DONE and done_since is not None and job['finishedAt'] >= done_since
+
+
+class MongoJobStore:
+    """
+    Jobs in MongoDB, shared by every worker process
+
+    Jobs are claimed atomically with find_one_and_update, and a TTL index on
+    expiresAt removes finished jobs. Dates are read back timezone-aware, so
+    they compare with the aware UTC times the queue writes.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection.with_options(
+            codec_options=CodecOptions(tz_aware=True)
+        )
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index([('dedupKey', ASCENDING), ('createdAt', DESCENDING)], name='dedupKey_createdAt')
+            await self.collection.create_index(
+                [('lane', ASCENDING), ('status', ASCENDING), ('createdAt', ASCENDING)],
+                name='lane_status_createdAt'
+            )
+            await self.collection.create_index('expiresAt', name='expiresAt_ttl', expireAfterSeconds=0)
+        except Exception as e:
+            log.warning("Failed to create job indexes", error=str(e))
+
+    async def insert(self, job: Dict):
+        await self.collection.insert_one(job)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({'_id': job_id})
+
+    async def find_reusable(self, dedup_key: str, now: datetime, done_since: Optional[datetime]) -> Optional[Dict]:
+        reusable = [{'status': {'$in': [QUEUED, RUNNING]}}]
+        if done_since is not None:
+            reusable.append({'status': DONE, 'finishedAt': {'$gte': done_since}})
+        return await self.collection.find_one(
+            {
+                'dedupKey': dedup_key,
+                '$or': reusable
+            },
+            sort=[('createdAt', DESCENDING)]
+        )
+
+    async def claim(self, lane: str, now: datetime, lease_until: datetime) -> Optional[Dict]:
+        job = await self.collection.find_one_and_update(
+            {
+                'lane': lane,
+                '$or': [
+                    {'status': QUEUED},
+                    {'status': RUNNING, 'leaseUntil': {'$lte': now}}
+                ]
+            },
+            {'$set': {'status': RUNNING, 'leaseUntil': lease_until}},
+            sort=[('createdAt', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is not None and job.get('startedAt') is None:
+            await self.collection.update_one({'_id': job['_id']}, {'$set': {'startedAt': now}})
+            job['startedAt'] = now
+        return job
+
+    async def record_result(self, job_id: str, index: int, result: Dict, lease_until: datetime):
+        # Only the first result for a set counts, even after a lease was reclaimed
+        await self.collection.update_one(
+            {'_id': job_id, f'results.{index}': None},
+            {
+                '$set': {f'results.{index}': result, 'leaseUntil': lease_until},
+                '$inc': {'completed': 1, 'failed': 0 if result['success'] else 1}
+            }
+        )
+
+    async def finish(self, job_id: str, update: Dict):
+        await self.collection.update_one({'_id': job_id}, {'$set': update})
+
+    async def purge(self, now: datetime) -> int:
+        # The TTL index does the cleanup
+        return 0
+
+
+class JobQueue:
+    """
+    Runs analysis jobs on a pool of background workers
+
+    submit() stores the job and returns at once; workers claim queued jobs,
+    interactive lane first, with at most `bulk_workers` of them on bulk jobs
+    at any time. Each profile set's result is recorded as soon as it
+    finishes, so callers can read partial results while the job runs.
+    Resubmitting an identical request returns the existing job while it is
+    queued or running, or finished within JOB_REUSE_DONE_SECONDS (never
+    for refresh requests).
+    """
+
+    def __init__(
+        self,
+        store,
+        analyse_fn: Callable[[Dict[str, Any], bool], Awaitable[Dict]],
+        workers: int = JOB_WORKERS,
+        bulk_workers: int = JOB_BULK_WORKERS,
+        set_concurrency: int = JOB_SET_CONCURRENCY,
+        ttl: float = JOB_TTL_SECONDS,
+        lease: float = JOB_LEASE_SECONDS,
+        poll_interval: float = JOB_POLL_SECONDS
+    ):
+        self.store = store
+        self.analyse_fn = analyse_fn
+        self.workers = workers
+        self.bulk_workers = min(bulk_workers, workers)
+        self.set_concurrency = set_concurrency
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._bulk_running = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._counters = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0, 'expired': 0}
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, profile_sets: List[Dict[str, Any]], profile_hashes: List[str], lane: str, refresh: bool = False) -> Dict:
+        """Queue a job, or return an identical queued, running or recently finished one"""
+        now = datetime.now(timezone.utc)
+        dedup_key = job_dedup_key(profile_hashes, refresh)
+
+        # Refresh jobs join a queued or running twin but never reuse finished results
+        done_since = None if refresh else now - timedelta(seconds=JOB_REUSE_DONE_SECONDS)
+        existing = await self.store.find_reusable(dedup_key, now, done_since)
+        if existing is not None:
+            self._counters['deduplicated'] += 1
+            return existing
+
+        job = {
+            '_id': uuid.uuid4().hex,
+            'dedupKey': dedup_key,
+            'lane': lane,
+            'status': QUEUED,
+            'refresh': refresh,
+            'profileSets': profile_sets,
+            'total': len(profile_sets),
+            'completed': 0,
+            'failed': 0,
+            'results': {},
+            'error': None,
+            'createdAt': now,
+            'startedAt': None,
+            'finishedAt': None,
+            'leaseUntil': None,
+            'expiresAt': None
+        }
+        await self.store.insert(job)
+        self._counters['submitted'] += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = await self.store.get(job_id)
+        if job is not None and _expired(job, datetime.now(timezone.utc)):
+            return None
+        return job
+
+    async def _claim(self) -> Optional[Dict]:
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=self.lease)
+        for lane in LANES:
+            bulk = lane == BULK
+            if bulk:
+                if self._bulk_running >= self.bulk_workers:
+                    continue
+                # Reserve the bulk slot before yielding to other workers
+                self._bulk_running += 1
+            try:
+                job = await self.store.claim(lane, now, lease_until)
+            except Exception:
+                self._bulk_running -= bulk
+                raise
+            if job is not None:
+                return job
+            self._bulk_running -= bulk
+        return None
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+                if job is None:
+                    self._counters['expired'] += await self.store.purge(datetime.now(timezone.utc))
+                    await self._idle()
+                    continue
+
+                try:
+                    await self._execute(job)
+                finally:
+                    self._bulk_running -= job['lane'] == BULK
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Job worker error", error=str(e))
+                await asyncio.sleep(self.poll_interval)
+
+    async def _idle(self):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, job: Dict):
+        job_id = job['_id']
+        # Sets finished before a lost lease are not redone
+        pending = [i for i in range(job['total']) if str(i) not in job['results']]
+        limit = asyncio.Semaphore(self.set_concurrency)
+
+        async def run_set(index: int):
+            async with limit:
+                try:
+                    analysis = await self.analyse_fn(job['profileSets'][index], job['refresh'])
+                    result = {'index': index, 'success': True, 'analysis': analysis}
+                except Exception as e:
+                    result = {'index': index, 'success': False, 'error': str(e)}
+            lease_until = datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+            await self.store.record_result(job_id, index, result, lease_until)
+
+        try:
+            await asyncio.gather(*(run_set(index) for index in pending))
+            update = {'status': DONE}
+            self._counters['completed'] += 1
+        except Exception as e:
+            log.error("Job failed", jobId=job_id, error=str(e))
+            update = {'status': FAILED, 'error': str(e)}
+            self._counters['failed'] += 1
+
+        now = datetime.now(timezone.utc)
+        await self.store.finish(job_id, {
+            **update,
+            'finishedAt': now,
+            'leaseUntil': None,
+            'expiresAt': now + timedelta(seconds=self.ttl)
+        })
+
+    def stats(self) -> Dict:
+        """This process's counters only; health probes must not query the store"""
+        return {
+            **self._counters,
+            'workers': self.workers,
+            'bulkWorkers': self.bulk_workers,
+            'bulkRunning': self._bulk_running
+        }
+
+
+def job_view(job: Dict, include_results: bool = True) -> Dict:
+    """Public form of a job: results as a list ordered by profile-set index"""
+    view = {
+        'id': job['_id'],
+        'status': job['status'],
+        'lane': job['lane'],
+        'total': job['total'],
+        'completed': job['completed'],
+        'failed': job['failed'],
+        'error': job.get('error'),
+        'createdAt': job['createdAt'],
+        'startedAt': job.get('startedAt'),
+        'finishedAt': job.get('finishedAt'),
+        'expiresAt': job.get('expiresAt')
+    }
+    if include_results:
+        view['results'] = [job['results'][key] for key in sorted(job['results'], key=int)]
+    return view
@@ -0,0 +1,164 @@
+"""
+Platform Analyser - Logging
+Structured logs written off the request path through a bounded queue
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 'json' (one object per line) or 'text' for local development
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Records waiting for the writer thread; more are dropped rather than blocking callers
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Share of high-volume records (logged with sample=True) that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+ROOT_LOGGER = "platform_analyser"
+
+# Keyword arguments that belong to logging itself; any others become fields
+_LOGGING_KWARGS = {'exc_info', 'stack_info', 'stacklevel', 'extra'}
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Logger taking fields as keyword arguments
+
+        log.warning("Fetch failed", platform="gfg", username=username)
+
+    sample=True marks a high-volume record that is kept at LOG_SAMPLE_RATE.
+    """
+
+    def process(self, msg: Any, kwargs: Dict) -> Any:
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _LOGGING_KWARGS}
+        extra = kwargs.setdefault('extra', {})
+        extra['sample'] = fields.pop('sample', False)
+        extra['fields'] = fields
+        return msg, kwargs
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'sample', False) and random.random() >= self.rate:
+            self.sampled_out += 1
+            return False
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without ever waiting
+
+    Only the message and exception text are rendered here; JSON encoding
+    and the stream write happen on the writer thread. When the queue is
+    full the record is counted and discarded.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+            **getattr(record, 'fields', {})
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+_lock = threading.Lock()
+_handler: DroppingQueueHandler = None
+_sampler: SamplingFilter = None
+_listener: logging.handlers.QueueListener = None
+
+
+def setup():
+    """Attach the queue handler and start the writer thread (once per process)"""
+    global _handler, _sampler, _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JSONFormatter())
+
+        log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _handler = DroppingQueueHandler(log_queue)
+        _sampler = SamplingFilter(LOG_SAMPLE_RATE)
+        _handler.addFilter(_sampler)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        # Keep these records out of uvicorn's (blocking) root handlers
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream)
+        _listener.start()
+        # Drain what is still queued when the process exits
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    setup()
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"), {})
+
+
+def stats() -> Dict:
+    """Queue depth and records lost to sampling or a full queue"""
+    if _handler is None:
+        return {'queued': 0, 'dropped': 0, 'sampledOut': 0}
+    return {
+        'queued': _handler.queue.qsize(),
+        'dropped': _handler.dropped,
+        'sampledOut': _sampler.sampled_out
+    }
@@ -0,0 +1,67 @@
+"""
+Platform Analyser - Metrics
+Prometheus metrics for the analysis pipeline, exposed on /metrics
+"""
+
+import threading
+from typing import Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+# Upstream calls take tens of ms to seconds; local stages are far quicker
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+
+
+# Incoming API requests
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_seconds', 'API request latency', ['method', 'route', 'status'], buckets=UPSTREAM_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'API requests being served')
+ANALYSES_IN_FLIGHT = Gauge('analyses_in_flight', 'Multi-platform analyses running')
+
+# Upstream HTTP, one observation per attempt (retries included)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    'upstream_request_seconds', 'Upstream request latency until the response headers', ['host'], buckets=UPSTREAM_BUCKETS
+)
+UPSTREAM_RESPONSES = Counter(
+    'upstream_responses_total', 'Upstream responses by status code ("error" for transport failures)', ['host', 'status']
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge('upstream_requests_in_flight', 'Upstream requests awaiting a response', ['host'])
+
+# Account fetches (cache misses only)
+PLATFORM_FETCH_SECONDS = Histogram(
+    'platform_fetch_seconds', 'Uncached account fetch latency', ['platform', 'outcome'], buckets=UPSTREAM_BUCKETS
+)
+PLATFORM_FETCH_STAGE_SECONDS = Histogram(
+    'platform_fetch_stage_seconds',
+    'Account fetch time by stage: batch_lookup, slot_wait, network, processing (parsing and bookkeeping)',
+    ['platform', 'stage'],
+    buckets=STAGE_BUCKETS
+)
+
+INSIGHTS_SECONDS = Histogram('insights_generation_seconds', 'AI insights generation time', buckets=STAGE_BUCKETS)
+
+MONGO_WRITE_SECONDS = Histogram(
+    'mongo_write_seconds', 'MongoDB write latency', ['operation'], buckets=UPSTREAM_BUCKETS
+)
+MONGO_WRITE_DOCUMENTS = Counter('mongo_write_documents_total', 'Documents written to MongoDB', ['outcome'])
+
+
+# Network time spent by the current thread, so a fetch can split its wall
+# time into network and processing without threading timers through scrapers
+_thread_network = threading.local()
+
+
+def add_network_time(seconds: float):
+    _thread_network.seconds = getattr(_thread_network, 'seconds', 0.0) + seconds
+
+
+def network_time() -> float:
+    return getattr(_thread_network, 'seconds', 0.0)
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
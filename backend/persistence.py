@@ -0,0 +1,297 @@
+"""
+Platform Analyser - Persistence
+Background, batched MongoDB writes for analysis documents
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+import metrics
+from logs import get_logger
+
+
+log = get_logger("persistence")
+
+
+WRITE_BATCH_SIZE = int(os.getenv("MONGO_WRITE_BATCH_SIZE", "100"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("MONGO_WRITE_FLUSH_SECONDS", "1"))
+WRITE_QUEUE_SIZE = int(os.getenv("MONGO_WRITE_QUEUE_SIZE", "1000"))
+# Longest a request waits for queue space before its document is dropped
+WRITE_ENQUEUE_TIMEOUT = float(os.getenv("MONGO_WRITE_ENQUEUE_TIMEOUT", "0.05"))
+
+_STOP = object()
+
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+# Stored analyses younger than this are served without scraping
+ANALYSIS_FRESH_SECONDS = float(os.getenv("ANALYSIS_FRESH_SECONDS", "600"))
+# Opt-in stale-while-revalidate: older analyses are still served for this
+# much longer while a background refresh runs; 0 (default) disables it
+ANALYSIS_STALE_SECONDS = float(os.getenv("ANALYSIS_STALE_SECONDS", "0"))
+
+# Top-level fields a history caller may project
+HISTORY_FIELDS = {'platforms', 'overall', 'duplicateAnalysis', 'aiInsights', 'timestamp', 'createdAt', 'accounts'}
+
+# Returned when no fields are requested: everything but the large insights blob
+HISTORY_DEFAULT_EXCLUDE = {'aiInsights'}
+
+
+def analysis_complete(analysis_result: Dict) -> bool:
+    """
+    Whether every account succeeded or was reported unknown by its platform
+
+    Timeouts, 5xx responses, open circuits and rate limiting are transient:
+    an analysis with such an account must not stand in for a fresh one.
+    """
+    return all(
+        data.get('success') or data.get('notFound')
+        for data in analysis_result.get('platforms', {}).values()
+    )
+
+
+def analysis_document(analysis_result: Dict, profile_hash: Optional[str] = None) -> Dict:
+    """
+    Stored form of an analysis
+
+    Adds createdAt and a flat, lower-cased `accounts` list so history can be
+    filtered by platform/username through an index (platform keys in
+    `platforms` vary per document and cannot be indexed). `profileHash`
+    identifies the normalized profile set for read-through lookups, which
+    only reuse `complete` analyses (no transient account failures).
+    """
+    accounts = [
+        {'platform': data.get('platform'), 'username': (data.get('username') or '').lower()}
+        for data in analysis_result.get('platforms', {}).values()
+    ]
+    return {
+        **analysis_result,
+        'accounts': accounts,
+        'profileHash': profile_hash,
+        'complete': analysis_complete(analysis_result),
+        'createdAt': datetime.now()
+    }
+
+
+async def ensure_indexes(collection):
+    """Create the indexes history browsing relies on (idempotent)"""
+    try:
+        await collection.create_index([('createdAt', DESCENDING), ('_id', DESCENDING)], name='createdAt_id')
+        await collection.create_index(
+            [('accounts.platform', ASCENDING), ('accounts.username', ASCENDING), ('createdAt', DESCENDING)],
+            name='accounts_createdAt'
+        )
+        await collection.create_index([('profileHash', ASCENDING), ('createdAt', DESCENDING)], name='profileHash_createdAt')
+        log.info("MongoDB indexes ready")
+    except Exception as e:
+        log.warning("Failed to create MongoDB indexes", error=str(e))
+
+
+async def find_recent_analysis(collection, profile_hash: str, max_age_seconds: float) -> Optional[Dict]:
+    """Newest complete stored analysis of a profile set, if younger than max_age_seconds"""
+    since = datetime.now() - timedelta(seconds=max_age_seconds)
+    return await collection.find_one(
+        {'profileHash': profile_hash, 'complete': True, 'createdAt': {'$gte': since}},
+        {'_id': 0, 'accounts': 0, 'profileHash': 0, 'complete': 0},
+        sort=[('createdAt', DESCENDING)]
+    )
+
+
+def encode_cursor(doc: Dict) -> str:
+    raw = json.dumps({'t': doc['createdAt'].isoformat(), 'id': str(doc['_id'])})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Raises ValueError for malformed cursors"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw['t']), ObjectId(raw['id'])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def fetch_history(
+    collection,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    platform: Optional[str] = None,
+    username: Optional[str] = None
+) -> Dict:
+    """
+    One page of analyses, newest first, using keyset pagination
+
+    The page after `cursor` is read by seeking past (createdAt, _id) of the
+    previous page's last document, so every page costs O(page size)
+    regardless of how deep the caller has paged. Raises ValueError for a
+    bad cursor or unknown field.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+
+    query: Dict = {}
+    if platform or username:
+        match = {}
+        if platform:
+            match['platform'] = platform
+        if username:
+            match['username'] = username.lower()
+        query['accounts'] = {'$elemMatch': match}
+
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query['$or'] = [
+            {'createdAt': {'$lt': created_at}},
+            {'createdAt': created_at, '_id': {'$lt': last_id}}
+        ]
+
+    if fields:
+        unknown = set(fields) - HISTORY_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # createdAt is always needed to build the next cursor
+        projection = {field: 1 for field in set(fields) | {'createdAt'}}
+    else:
+        projection = {field: 0 for field in HISTORY_DEFAULT_EXCLUDE}
+
+    docs = await (
+        collection
+        .find(query, projection)
+        .sort([('createdAt', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    analyses = docs[:limit]
+    for doc in analyses:
+        doc.pop('_id', None)
+
+    return {'analyses': analyses, 'count': len(analyses), 'nextCursor': next_cursor}
+
+
+class AnalysisWriteQueue:
+    """
+    Bounded queue flushed to MongoDB with insert_many
+
+    Requests hand documents over with submit() and return immediately; a
+    background task writes them in bulk once `batch_size` documents are
+    queued or `flush_interval` seconds have passed. When the queue is full,
+    submit() waits up to `enqueue_timeout` for space (backpressure) and then
+    drops the document rather than holding the response. stop() flushes
+    everything already queued.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL,
+        max_queue: int = WRITE_QUEUE_SIZE,
+        enqueue_timeout: float = WRITE_ENQUEUE_TIMEOUT
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+        self._counters = {'submitted': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting documents and flush the backlog"""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, doc: Dict) -> bool:
+        """Queue a document for writing; False if it was dropped"""
+        if self._closed:
+            self._counters['dropped'] += 1
+            return False
+
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(doc), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self._counters['dropped'] += 1
+                log.warning("MongoDB write queue full, analysis not saved", sample=True)
+                return False
+
+        self._counters['submitted'] += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Dict]):
+        start = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            written = len(batch)
+            self._counters['batches'] += 1
+            log.debug("Saved analyses to MongoDB", count=len(batch))
+        except BulkWriteError as e:
+            written = e.details.get('nInserted', 0)
+            log.warning("Failed to save some analyses to MongoDB", failed=len(batch) - written, batch=len(batch))
+        except Exception as e:
+            written = 0
+            log.warning("Failed to save analyses to MongoDB", failed=len(batch), error=str(e))
+        
+        metrics.MONGO_WRITE_SECONDS.labels('insert_many').observe(time.perf_counter() - start)
+        self._counters['written'] += written
+        self._counters['failed'] += len(batch) - written
+        metrics.MONGO_WRITE_DOCUMENTS.labels('written').inc(written)
+        metrics.MONGO_WRITE_DOCUMENTS.labels('failed').inc(len(batch) - written)
+
+    def stats(self) -> Dict:
+        return {
+            **self._counters,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'maxQueue': self.max_queue
+        }
@@ -0,0 +1,170 @@
+"""
+Platform Analyser - Solved Problem Index
+Integer-interned solved-problem sets for exact duplicate detection
+"""
+
+import json
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from logs import get_logger
+
+
+log = get_logger("problem_index")
+
+PROBLEM_MAP_PATH = os.getenv(
+    "PROBLEM_MAP_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "problem_map.json")
+)
+
+
+class ProblemInterner:
+    """
+    Maps platform problem identifiers to small dense integers
+
+    Each distinct "platform:problem_id" string is stored once per process, so
+    per-account solved sets only hold 4-byte ints. The table is bounded by the
+    number of distinct problems on the supported platforms.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, platform: str, problem_id: str) -> int:
+        key = f"{platform}:{problem_id}"
+        interned = self._ids.get(key)
+        if interned is not None:
+            return interned
+
+        with self._lock:
+            interned = self._ids.get(key)
+            if interned is None:
+                interned = len(self._keys)
+                self._keys.append(key)
+                self._ids[key] = interned
+        return interned
+
+    def lookup(self, interned: int) -> str:
+        return self._keys[interned]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class CanonicalProblemMap:
+    """
+    Cross-platform problem identity table
+
+    Built offline by build_problem_map.py. On load every mapped platform id is
+    interned and a dense array indexed by interned id holds its canonical
+    number (-1 when unmapped), so a lookup is a single array read.
+    """
+
+    def __init__(self, interner: ProblemInterner):
+        self.interner = interner
+        self.version = 0
+        self.canonical_ids: List[str] = []
+        self._table = array('i')
+
+    def load(self, path: str = PROBLEM_MAP_PATH):
+        """Load a built table; a missing file leaves the map empty"""
+        if not os.path.exists(path):
+            log.warning("Problem map not found, cross-platform matching disabled", path=path)
+            return
+
+        with open(path) as f:
+            data = json.load(f)
+
+        pairs = [
+            (self.interner.intern(platform, problem_id), canonical)
+            for platform, entries in data.get('entries', {}).items()
+            for problem_id, canonical in entries
+        ]
+        table = array('i', [-1]) * (max((i for i, _ in pairs), default=-1) + 1)
+        for interned, canonical in pairs:
+            table[interned] = canonical
+
+        self.version = data.get('version', 0)
+        self.canonical_ids = data.get('canonical', [])
+        self._table = table
+        log.info("Loaded problem map", version=self.version, platformIds=len(pairs))
+
+    def canonical(self, interned: int) -> Optional[int]:
+        if interned < len(self._table):
+            canonical = self._table[interned]
+            if canonical >= 0:
+                return canonical
+        return None
+
+    def identity(self, interned: int) -> int:
+        """Key shared by all platform ids of one canonical problem"""
+        canonical = self.canonical(interned)
+        # Canonical problems use negative keys so they never clash with interned ids
+        return interned if canonical is None else -(canonical + 1)
+
+    def stats(self) -> Dict:
+        return {
+            'version': self.version,
+            'canonicalProblems': len(self.canonical_ids),
+            'mappedIds': sum(1 for c in self._table if c >= 0)
+        }
+
+
+class SolvedProblemIndex:
+    """
+    Solved-problem sets for every account in one analysis
+
+    Sets are stored as sorted unsigned-int arrays of interned ids; overlap
+    between accounts on the same platform is computed exactly from them.
+    """
+
+    def __init__(self, interner: ProblemInterner):
+        self.interner = interner
+        # platform -> account_key -> sorted array of interned ids
+        self._accounts: Dict[str, Dict[str, array]] = {}
+
+    def add(self, platform: str, account_key: str, problem_ids: Iterable[str]):
+        interned = sorted({self.interner.intern(platform, str(pid)) for pid in problem_ids})
+        self._accounts.setdefault(platform, {})[account_key] = array('I', interned)
+
+    def platform_overlap(self) -> Dict[str, Dict]:
+        """Per platform: identified problems, distinct problems and duplicates"""
+        overlap = {}
+        for platform, accounts in self._accounts.items():
+            identified = sum(len(ids) for ids in accounts.values())
+            distinct = len(set().union(*accounts.values())) if accounts else 0
+            overlap[platform] = {
+                'accounts': len(accounts),
+                'identifiedProblems': identified,
+                'distinctProblems': distinct,
+                'duplicates': identified - distinct
+            }
+        return overlap
+
+    def cross_platform_overlap(self, canonical_map: CanonicalProblemMap) -> Dict:
+        """
+        Distinct problems across all platforms, merging canonical equivalents
+
+        A LeetCode and a GFG id mapped to the same canonical problem count once.
+        """
+        identities = set()
+        identified = 0
+        for accounts in self._accounts.values():
+            for ids in accounts.values():
+                identified += len(ids)
+                identities.update(canonical_map.identity(i) for i in ids)
+
+        return {
+            'identifiedProblems': identified,
+            'distinctProblems': len(identities),
+            'duplicates': identified - len(identities)
+        }
+
+
+# Singleton instances
+problem_interner = ProblemInterner()
+canonical_problem_map = CanonicalProblemMap(problem_interner)
@@ -0,0 +1,278 @@
+"""
+Platform Analyser - Percentile Ranking
+Incrementally updated rank index over analyzed profile sets
+"""
+
+import asyncio
+import os
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from logs import get_logger
+from persistence import analysis_complete
+
+
+log = get_logger("ranking")
+
+
+# Values are counted per integer; larger ones share the top bucket
+RANK_METRIC_LIMITS = {
+    'total': int(os.getenv("RANK_MAX_TOTAL", "20000")),
+    'hard': int(os.getenv("RANK_MAX_HARD", "5000")),
+    'score': 100
+}
+# How often counts recorded by other workers are reloaded from MongoDB
+RANK_RELOAD_SECONDS = float(os.getenv("RANK_RELOAD_SECONDS", "300"))
+# Analyses waiting to be ranked; more are dropped rather than delaying responses
+RANK_QUEUE_SIZE = int(os.getenv("RANK_QUEUE_SIZE", "1000"))
+# Profile sets ranked without MongoDB; the least recently analyzed leave the index
+RANK_LOCAL_MAX_MEMBERS = int(os.getenv("RANK_LOCAL_MAX_MEMBERS", "100000"))
+
+_STOP = object()
+
+
+def rank_values(analysis: Dict) -> Optional[Dict[str, int]]:
+    """
+    Ranked metrics of an analysis; None unless it is complete and some account succeeded
+
+    An analysis with a transiently failed account understates the profile
+    set, so it neither enters the index nor replaces the set's ranked values.
+    """
+    platforms = (analysis.get('platforms') or {}).values()
+    if not any(data.get('success') for data in platforms) or not analysis_complete(analysis):
+        return None
+    overall = analysis.get('overall') or {}
+    stats = overall.get('stats', {})
+    values = {'total': stats.get('total', 0), 'hard': stats.get('hard', 0)}
+    score = ((analysis.get('aiInsights') or {}).get('performanceScore') or {}).get('score')
+    if score is not None:
+        values['score'] = score
+    return values
+
+
+class CountTree:
+    """
+    Counts per integer value in a Fenwick tree
+
+    add() and at_or_below() are O(log n) in the value range, independent of
+    how many values were counted.
+    """
+
+    def __init__(self, max_value: int):
+        self.max_value = max_value
+        self._tree = array('q', [0]) * (max_value + 2)
+        self.count = 0
+
+    def _slot(self, value: float) -> int:
+        return min(max(int(value), 0), self.max_value) + 1
+
+    def add(self, value: float, delta: int = 1):
+        i = self._slot(value)
+        self.count += delta
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def at_or_below(self, value: float) -> int:
+        i = self._slot(value)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class LocalRankStore:
+    """Last ranked values of the most recently analyzed profile sets, in process memory"""
+
+    def __init__(self, max_members: int = RANK_LOCAL_MAX_MEMBERS):
+        self.max_members = max_members
+        self._members: OrderedDict = OrderedDict()
+
+    async def swap(self, profile_hash: str, values: Dict[str, int]) -> Tuple[Optional[Dict[str, int]], List[Dict[str, int]]]:
+        previous = self._members.pop(profile_hash, None)
+        self._members[profile_hash] = values
+        evicted = []
+        while len(self._members) > self.max_members:
+            evicted.append(self._members.popitem(last=False)[1])
+        return previous, evicted
+
+    async def apply(self, previous: Optional[Dict[str, int]], values: Dict[str, int]):
+        pass
+
+    async def load(self) -> Optional[Dict[str, Dict[int, int]]]:
+        return None
+
+
+class MongoRankStore:
+    """
+    Rank counts persisted in MongoDB
+
+    `members` holds each profile set's last ranked values and `histograms`
+    one document per metric with {value: count}; both are updated with
+    single-document writes, so any worker can rebuild the index by reading
+    just the histogram documents.
+    """
+
+    def __init__(self, members, histograms):
+        self.members = members
+        self.histograms = histograms
+
+    async def swap(self, profile_hash: str, values: Dict[str, int]) -> Tuple[Optional[Dict[str, int]], List[Dict[str, int]]]:
+        previous = await self.members.find_one_and_update(
+            {'_id': profile_hash},
+            {'$set': {'values': values}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        return (previous['values'] if previous else None), []
+
+    async def apply(self, previous: Optional[Dict[str, int]], values: Dict[str, int]):
+        for metric in RANK_METRIC_LIMITS:
+            inc: Dict[str, int] = {}
+            if previous and metric in previous:
+                key = f"counts.{int(previous[metric])}"
+                inc[key] = inc.get(key, 0) - 1
+            if metric in values:
+                key = f"counts.{int(values[metric])}"
+                inc[key] = inc.get(key, 0) + 1
+            inc = {key: delta for key, delta in inc.items() if delta}
+            if inc:
+                await self.histograms.update_one({'_id': metric}, {'$inc': inc}, upsert=True)
+
+    async def load(self) -> Optional[Dict[str, Dict[int, int]]]:
+        histograms = {}
+        async for doc in self.histograms.find():
+            histograms[doc['_id']] = {int(value): count for value, count in doc.get('counts', {}).items()}
+        return histograms
+
+
+class RankIndex:
+    """
+    Percentile ranks of total, hard and score among analyzed profile sets
+
+    Each profile set counts once, with the values of its latest analysis.
+    record() only queues the analysis: a background task moves its profile
+    set's counts in the store and then in the trees, so responses never wait
+    on the database. Lookups only walk the in-memory count trees, never the
+    stored analyses.
+    """
+
+    def __init__(self, store=None, reload_interval: float = RANK_RELOAD_SECONDS, max_queue: int = RANK_QUEUE_SIZE):
+        self.store = store if store is not None else LocalRankStore()
+        self.reload_interval = reload_interval
+        self.max_queue = max_queue
+        self.trees = {metric: CountTree(limit) for metric, limit in RANK_METRIC_LIMITS.items()}
+        self._task: Optional[asyncio.Task] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._counters = {'queued': 0, 'applied': 0, 'dropped': 0, 'failed': 0}
+
+    async def load(self):
+        """Rebuild the count trees from the store's histograms"""
+        try:
+            histograms = await self.store.load()
+        except Exception as e:
+            log.warning("Failed to load rank index", error=str(e))
+            return
+        if histograms is None:
+            return
+
+        trees = {metric: CountTree(limit) for metric, limit in RANK_METRIC_LIMITS.items()}
+        for metric, counts in histograms.items():
+            tree = trees.get(metric)
+            if tree is None:
+                continue
+            for value, count in counts.items():
+                if count:
+                    tree.add(value, count)
+        self.trees = trees
+
+    async def start(self):
+        await self.load()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._writer = asyncio.create_task(self._run())
+        if not isinstance(self.store, LocalRankStore):
+            self._task = asyncio.create_task(self._reload_periodically())
+
+    async def stop(self):
+        """Stop reloading and apply the queued analyses"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._writer is not None:
+            await self._queue.put(_STOP)
+            await self._writer
+            self._writer = None
+            self._queue = None
+
+    async def _reload_periodically(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.load()
+
+    def record(self, profile_hash: str, analysis: Dict) -> bool:
+        """Queue an analysis for ranking; False if it was dropped"""
+        values = rank_values(analysis)
+        if values is None or self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait((profile_hash, values))
+        except asyncio.QueueFull:
+            self._counters['dropped'] += 1
+            return False
+        self._counters['queued'] += 1
+        return True
+
+    async def _run(self):
+        # One writer, so each profile set's swaps apply in submission order
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            await self._apply(*item)
+
+    async def _apply(self, profile_hash: str, values: Dict[str, int]):
+        try:
+            previous, evicted = await self.store.swap(profile_hash, values)
+            if previous != values:
+                await self.store.apply(previous, values)
+        except Exception as e:
+            self._counters['failed'] += 1
+            log.warning("Failed to record rank values", error=str(e))
+            return
+
+        self._counters['applied'] += 1
+        for metric, tree in self.trees.items():
+            for dropped in evicted:
+                if metric in dropped:
+                    tree.add(dropped[metric], -1)
+            if previous == values:
+                continue
+            if previous and metric in previous:
+                tree.add(previous[metric], -1)
+            if metric in values:
+                tree.add(values[metric])
+
+    def percentiles(self, analysis: Dict) -> Optional[Dict]:
+        """Share of ranked profile sets at or below this analysis, per metric"""
+        values = rank_values(analysis)
+        if values is None:
+            return None
+        ranks = {}
+        for metric, value in values.items():
+            tree = self.trees[metric]
+            ranks[metric] = round(tree.at_or_below(value) / tree.count * 100, 1) if tree.count else None
+        ranks['population'] = self.trees['total'].count
+        return ranks
+
+    def stats(self) -> Dict:
+        return {
+            **{metric: tree.count for metric, tree in self.trees.items()},
+            **self._counters,
+            'pending': self._queue.qsize() if self._queue is not None else 0
+        }
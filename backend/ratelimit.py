@@ -0,0 +1,205 @@
+"""
+Platform Analyser - Rate Limiting
+Per-host token buckets shared across workers through a pluggable backend
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/platform_analyser_ratelimit.db")
+# How long a request may queue for a token before it is rejected
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "5"))
+
+# (tokens per second, burst) per upstream host
+HOST_RATE_LIMITS = {
+    'leetcode.com': (
+        float(os.getenv("LEETCODE_RATE_PER_SECOND", "5")),
+        float(os.getenv("LEETCODE_RATE_BURST", "10"))
+    ),
+    'codeforces.com': (
+        float(os.getenv("CODEFORCES_RATE_PER_SECOND", "1")),
+        float(os.getenv("CODEFORCES_RATE_BURST", "5"))
+    ),
+    'practiceapi.geeksforgeeks.org': (
+        float(os.getenv("GFG_RATE_PER_SECOND", "5")),
+        float(os.getenv("GFG_RATE_BURST", "10"))
+    ),
+    'www.geeksforgeeks.org': (
+        float(os.getenv("GFG_RATE_PER_SECOND", "5")),
+        float(os.getenv("GFG_RATE_BURST", "10"))
+    )
+}
+
+
+class RateLimitExceeded(Exception):
+    """No token became available within the maximum queue wait"""
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(now - updated, 0.0) * rate)
+
+
+def _take(tokens: float, rate: float) -> Tuple[float, float]:
+    """(remaining tokens, seconds to wait); wait is 0 when a token was taken"""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class InProcessBackend:
+    """Buckets in process memory; limits apply per worker"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, rate: float, burst: float) -> float:
+        """Take a token if available; otherwise return seconds until one is"""
+        with self._lock:
+            now = time.time()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, wait = _take(_refill(tokens, updated, now, rate, burst), rate)
+            self._buckets[key] = (tokens, now)
+            return wait
+
+
+class SQLiteBackend:
+    """Buckets in a shared SQLite file; coordinates workers on one host"""
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self, key: str, rate: float, burst: float) -> float:
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front so read-modify-write is atomic
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, wait = _take(_refill(tokens, updated, now, rate, burst), rate)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class MongoBackend:
+    """Buckets in a MongoDB collection; coordinates workers across hosts"""
+
+    MAX_CONFLICT_RETRIES = 10
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def try_acquire(self, key: str, rate: float, burst: float) -> float:
+        # Optimistic compare-and-set on the bucket's last update time
+        for _ in range(self.MAX_CONFLICT_RETRIES):
+            now = time.time()
+            doc = self.collection.find_one({'_id': key})
+
+            if doc is None:
+                tokens, wait = _take(burst, rate)
+                try:
+                    self.collection.insert_one({'_id': key, 'tokens': tokens, 'updated': now})
+                    return wait
+                except DuplicateKeyError:
+                    continue
+
+            tokens, wait = _take(_refill(doc['tokens'], doc['updated'], now, rate, burst), rate)
+            result = self.collection.update_one(
+                {'_id': key, 'updated': doc['updated']},
+                {'$set': {'tokens': tokens, 'updated': now}}
+            )
+            if result.modified_count == 1:
+                return wait
+
+        # Heavy contention: back off briefly rather than spin
+        return 1 / rate
+
+
+def build_backend(kind: str = RATE_LIMIT_BACKEND, collection=None):
+    """Backend by name: 'memory', 'sqlite' or 'mongodb' (needs a collection)"""
+    if kind == 'sqlite':
+        return SQLiteBackend()
+    if kind == 'mongodb' and collection is not None:
+        return MongoBackend(collection)
+    return InProcessBackend()
+
+
+class RateLimiter:
+    """
+    Client-side throttle in front of the upstream hosts
+
+    acquire() queues the caller (sleeping) until its host's bucket yields a
+    token, and raises RateLimitExceeded once that would take longer than
+    max_wait. Hosts without a configured limit are not throttled.
+    """
+
+    def __init__(self, backend=None, limits: Optional[Dict[str, Tuple[float, float]]] = None, max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS):
+        self.backend = backend if backend is not None else InProcessBackend()
+        self.limits = limits if limits is not None else HOST_RATE_LIMITS
+        self.max_wait = max_wait
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        limit = self.limits.get(host)
+        if limit is None:
+            return
+        rate, burst = limit
+
+        waited = 0.0
+        while True:
+            wait = self.backend.try_acquire(host, rate, burst)
+            if wait <= 0:
+                self._record(host, waited, rejected=False)
+                return
+            if waited + wait > self.max_wait:
+                self._record(host, waited, rejected=True)
+                raise RateLimitExceeded(f"Rate limit for {host} exceeded, try again shortly")
+            time.sleep(wait)
+            waited += wait
+
+    def _record(self, host: str, waited: float, rejected: bool):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'acquired': 0, 'queued': 0, 'rejected': 0, 'totalWaitSeconds': 0.0, 'maxWaitSeconds': 0.0
+            })
+            stats['rejected' if rejected else 'acquired'] += 1
+            if waited > 0:
+                stats['queued'] += 1
+                stats['totalWaitSeconds'] += waited
+                stats['maxWaitSeconds'] = max(stats['maxWaitSeconds'], waited)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            snapshot = {host: dict(stats) for host, stats in self._stats.items()}
+        for stats in snapshot.values():
+            stats['totalWaitSeconds'] = round(stats['totalWaitSeconds'], 3)
+            stats['maxWaitSeconds'] = round(stats['maxWaitSeconds'], 3)
+        return {'backend': type(self.backend).__name__, 'hosts': snapshot}
@@ -0,0 +1,158 @@
+"""
+Platform Analyser - Resilience
+Retry policy for transient upstream errors and per-upstream circuit breakers
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential
+)
+
+
+RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("UPSTREAM_RETRY_BACKOFF_SECONDS", "0.5"))
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("UPSTREAM_RETRY_BACKOFF_MAX_SECONDS", "8"))
+# A Retry-After longer than this is not worth waiting for; fail instead
+RETRY_AFTER_MAX_SECONDS = float(os.getenv("UPSTREAM_RETRY_AFTER_MAX_SECONDS", "10"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RetryableHTTPError(Exception):
+    """Upstream answered with 429 or a 5xx status"""
+
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        super().__init__(f"HTTP {response.status_code} from {response.request.url.host}")
+
+
+class CircuitOpenError(Exception):
+    """Call rejected because the upstream's circuit breaker is open"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header as seconds (delta-seconds or HTTP-date form)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx; never 4xx or parse errors"""
+    if isinstance(error, RetryableHTTPError):
+        return error.retry_after is None or error.retry_after <= RETRY_AFTER_MAX_SECONDS
+    return isinstance(error, httpx.TransportError)
+
+
+class wait_retry_after:
+    """Honor the upstream's Retry-After when present, else jittered exponential backoff"""
+
+    def __init__(self):
+        self.fallback = wait_random_exponential(multiplier=RETRY_BACKOFF_SECONDS, max=RETRY_BACKOFF_MAX_SECONDS)
+
+    def __call__(self, retry_state) -> float:
+        error = retry_state.outcome.exception()
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after
+        return self.fallback(retry_state)
+
+
+def retry_policy(on_retry=None) -> Retrying:
+    return Retrying(
+        retry=retry_if_exception(is_retryable),
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        wait=wait_retry_after(),
+        before_sleep=on_retry,
+        reraise=True
+    )
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream
+
+    After `failure_threshold` failed calls in a row the circuit opens and
+    calls fail immediately for `reset_timeout` seconds. Then a single probe
+    call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may proceed"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} is temporarily unavailable (circuit open)")
+                self.state = self.HALF_OPEN
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} is temporarily unavailable (circuit half-open)")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Call ended without an upstream verdict (e.g. throttled locally)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutiveFailures': self._failures,
+                'rejected': self._rejected
+            }
@@ -0,0 +1,248 @@
+"""
+Platform Analyser - Refresh Scheduler
+Periodic background re-analysis of tracked profile sets
+"""
+
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+from logs import get_logger
+
+
+log = get_logger("scheduler")
+
+
+# Target seconds between refreshes of one tracked profile set; keep it below
+# ANALYSIS_FRESH_SECONDS so interactive requests find a fresh snapshot
+TRACKED_REFRESH_SECONDS = float(os.getenv("TRACKED_REFRESH_SECONDS", "540"))
+# Each interval is randomized by up to this fraction so refreshes do not align
+TRACKED_REFRESH_JITTER = float(os.getenv("TRACKED_REFRESH_JITTER", "0.1"))
+# Upstream accounts the scheduler may refresh per minute, leaving the rest of
+# the rate budget to interactive requests
+TRACKED_ACCOUNTS_PER_MINUTE = float(os.getenv("TRACKED_ACCOUNTS_PER_MINUTE", "30"))
+TRACKED_MAX_CONCURRENT = int(os.getenv("TRACKED_MAX_CONCURRENT", "2"))
+TRACKED_TICK_SECONDS = float(os.getenv("TRACKED_TICK_SECONDS", "5"))
+TRACKED_LIST_MAX = int(os.getenv("TRACKED_LIST_MAX", "500"))
+
+
+class TrackedProfileStore:
+    """Tracked profile sets in process memory (lost on restart)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}
+
+    async def upsert(self, entry: Dict) -> Dict:
+        existing = self._entries.get(entry['_id'])
+        if existing is not None:
+            return dict(existing)
+        self._entries[entry['_id']] = dict(entry)
+        return dict(entry)
+
+    async def remove(self, profile_hash: str) -> bool:
+        return self._entries.pop(profile_hash, None) is not None
+
+    async def list(self, limit: int) -> List[Dict]:
+        entries = sorted(self._entries.values(), key=lambda e: e['nextRefreshAt'])
+        return [dict(e) for e in entries[:limit]]
+
+    async def count(self) -> int:
+        return len(self._entries)
+
+    async def claim_due(self, now: datetime, lease_until: datetime) -> Optional[Dict]:
+        """Take the most overdue entry, pushing its next refresh to lease_until"""
+        due = [e for e in self._entries.values() if e['nextRefreshAt'] <= now]
+        if not due:
+            return None
+        entry = min(due, key=lambda e: e['nextRefreshAt'])
+        claimed = dict(entry)
+        entry['nextRefreshAt'] = lease_until
+        return claimed
+
+    async def finish(self, profile_hash: str, update: Dict):
+        entry = self._entries.get(profile_hash)
+        if entry is not None:
+            entry.update(update)
+
+
+class MongoTrackedProfileStore:
+    """
+    Tracked profile sets in MongoDB
+
+    Entries are claimed with find_one_and_update, so several workers can run
+    the scheduler against one collection without refreshing a set twice.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index([('nextRefreshAt', ASCENDING)], name='nextRefreshAt')
+        except Exception as e:
+            log.warning("Failed to create tracked profile indexes", error=str(e))
+
+    async def upsert(self, entry: Dict) -> Dict:
+        return await self.collection.find_one_and_update(
+            {'_id': entry['_id']},
+            {'$setOnInsert': entry},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def remove(self, profile_hash: str) -> bool:
+        result = await self.collection.delete_one({'_id': profile_hash})
+        return result.deleted_count == 1
+
+    async def list(self, limit: int) -> List[Dict]:
+        return await self.collection.find().sort('nextRefreshAt', ASCENDING).limit(limit).to_list(limit)
+
+    async def count(self) -> int:
+        return await self.collection.count_documents({})
+
+    async def claim_due(self, now: datetime, lease_until: datetime) -> Optional[Dict]:
+        return await self.collection.find_one_and_update(
+            {'nextRefreshAt': {'$lte': now}},
+            {'$set': {'nextRefreshAt': lease_until}},
+            sort=[('nextRefreshAt', ASCENDING)],
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def finish(self, profile_hash: str, update: Dict):
+        await self.collection.update_one({'_id': profile_hash}, {'$set': update})
+
+
+class RefreshScheduler:
+    """
+    Re-analyzes tracked profile sets before their stored snapshot goes stale
+
+    Every tick the scheduler earns account credit at `accounts_per_minute`
+    and claims due profile sets while the credit covers their account count,
+    so a large tracked population is spread evenly over time instead of
+    bursting against the upstream rate limits. Each refresh is rescheduled
+    `interval` seconds later, randomized by `jitter`.
+
+    A disabled scheduler (no snapshot store to refresh into) never runs.
+    """
+
+    def __init__(
+        self,
+        store,
+        refresh_fn: Callable[[Dict[str, Any], str], Awaitable[Any]],
+        interval: float = TRACKED_REFRESH_SECONDS,
+        jitter: float = TRACKED_REFRESH_JITTER,
+        accounts_per_minute: float = TRACKED_ACCOUNTS_PER_MINUTE,
+        max_concurrent: int = TRACKED_MAX_CONCURRENT,
+        tick: float = TRACKED_TICK_SECONDS,
+        enabled: bool = True
+    ):
+        self.store = store
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self.jitter = jitter
+        self.accounts_per_minute = accounts_per_minute
+        self.max_concurrent = max_concurrent
+        self.tick = tick
+        self.enabled = enabled
+        self._credit = 0.0
+        self._running: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {'refreshed': 0, 'failed': 0}
+
+    def _next_refresh(self, now: datetime) -> datetime:
+        spread = self.interval * self.jitter
+        return now + timedelta(seconds=self.interval + random.uniform(-spread, spread))
+
+    async def track(self, profiles: Dict[str, List[str]], profile_hash: str) -> Dict:
+        """Register a normalized profile set; it is first refreshed as budget allows"""
+        now = datetime.now()
+        return await self.store.upsert({
+            '_id': profile_hash,
+            'profiles': profiles,
+            'accounts': sum(len(usernames) for usernames in profiles.values()),
+            'createdAt': now,
+            'nextRefreshAt': now,
+            'lastRefreshAt': None,
+            'lastError': None
+        })
+
+    async def untrack(self, profile_hash: str) -> bool:
+        return await self.store.remove(profile_hash)
+
+    async def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running.values(), return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Refresh scheduler error", error=str(e))
+            await asyncio.sleep(self.tick)
+
+    async def _dispatch(self):
+        # Unused credit is capped at one minute's worth so an idle period
+        # does not turn into a burst
+        per_tick = self.accounts_per_minute * self.tick / 60
+        self._credit = min(self._credit + per_tick, max(self.accounts_per_minute, per_tick))
+
+        while len(self._running) < self.max_concurrent:
+            now = datetime.now()
+            entry = await self.store.claim_due(now, self._next_refresh(now))
+            if entry is None:
+                return
+
+            # A set larger than the per-minute budget still runs once the
+            # credit is full, rather than starving
+            cost = min(entry.get('accounts', 1), self.accounts_per_minute)
+            if cost > self._credit:
+                await self.store.finish(entry['_id'], {'nextRefreshAt': entry['nextRefreshAt']})
+                return
+            self._credit -= cost
+
+            task = asyncio.create_task(self._refresh(entry))
+            self._running[entry['_id']] = task
+            task.add_done_callback(lambda _, key=entry['_id']: self._running.pop(key, None))
+
+    async def _refresh(self, entry: Dict):
+        try:
+            await self.refresh_fn(entry['profiles'], entry['_id'])
+            self._counters['refreshed'] += 1
+            update = {'lastRefreshAt': datetime.now(), 'lastError': None}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._counters['failed'] += 1
+            log.warning("Scheduled refresh failed", profileHash=entry['_id'], error=str(e))
+            update = {'lastError': str(e)}
+
+        try:
+            await self.store.finish(entry['_id'], update)
+        except Exception as e:
+            log.warning("Failed to record refresh", profileHash=entry['_id'], error=str(e))
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            **self._counters,
+            'running': len(self._running),
+            'credit': round(self._credit, 2),
+            'intervalSeconds': self.interval,
+            'accountsPerMinute': self.accounts_per_minute
+        }
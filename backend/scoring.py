@@ -0,0 +1,178 @@
+"""
+Platform Analyser - Cohort Scoring
+Vectorized AIInsightsService scoring for many profiles at once
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple, Union
+
+import numpy as np
+
+
+ArrayLike = Union[np.ndarray, Iterable[float]]
+
+GRADES = np.array(['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C'])
+GRADE_THRESHOLDS = (90, 85, 80, 75, 70, 65, 60)
+
+# generate_insights() skill level
+LEVELS = np.array(['Expert', 'Advanced', 'Intermediate', 'Developing', 'Beginner'])
+LEVEL_THRESHOLDS = (500, 300, 150, 50)
+
+# _analyze_difficulty() level, which picks the ideal distribution
+DIFFICULTY_LEVELS = np.array(['expert', 'advanced', 'intermediate', 'beginner'])
+DIFFICULTY_LEVEL_THRESHOLDS = (300, 150, 50)
+
+
+def _tiered(values: np.ndarray, thresholds: Iterable[float]) -> np.ndarray:
+    """Index of the first threshold `values` reach (len(thresholds) if none)"""
+    return np.select([values >= t for t in thresholds], list(range(len(thresholds))), default=len(thresholds))
+
+
+def _percentage(part: np.ndarray, total: np.ndarray) -> np.ndarray:
+    # Same operation order as the scalar code (part / total * 100) so
+    # results are bit-identical; 0 where total is 0
+    out = np.zeros(total.shape, dtype=np.float64)
+    np.divide(part, total, out=out, where=total > 0)
+    return out * 100
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Percentage of the cohort scoring at or below each value (0-100]"""
+    if values.size == 0:
+        return np.zeros(0, dtype=np.float64)
+    ordered = np.sort(values)
+    return np.searchsorted(ordered, values, side='right') / values.size * 100
+
+
+def score_cohort(
+    easy: ArrayLike,
+    medium: ArrayLike,
+    hard: ArrayLike,
+    total: ArrayLike,
+    unique: ArrayLike,
+    platforms_analyzed: ArrayLike
+) -> Dict[str, np.ndarray]:
+    """
+    Score a cohort from columnar stats in one vectorized pass
+
+    Each argument holds one value per profile (an analysis' overall.stats
+    and overall.platformsAnalyzed). Scores, grades, breakdowns, levels and
+    difficulty percentages equal what AIInsightsService produces for each
+    profile on its own; percentiles rank scores within the cohort. Where
+    total is 0 the difficulty percentages are 0 (the scalar code skips
+    insights for such analyses).
+    """
+    easy = np.asarray(easy, dtype=np.float64)
+    medium = np.asarray(medium, dtype=np.float64)
+    hard = np.asarray(hard, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    unique = np.asarray(unique, dtype=np.float64)
+    platforms_analyzed = np.asarray(platforms_analyzed, dtype=np.float64)
+
+    easy_pct = _percentage(easy, total)
+    medium_pct = _percentage(medium, total)
+    hard_pct = _percentage(hard, total)
+    unique_pct = _percentage(unique, total)
+
+    # Volume (max 30)
+    volume = np.select(
+        [total >= 500, total >= 300, total >= 150, total >= 50],
+        [30.0, 25.0, 20.0, 15.0],
+        default=np.minimum(total / 5, 10)
+    )
+
+    # Difficulty (max 35)
+    hard_score = np.select([hard_pct > 25, hard_pct > 15, hard_pct > 5], [15, 10, 5], default=0)
+    medium_score = np.select([(medium_pct > 40) & (medium_pct < 60), medium_pct > 30], [20, 15], default=10)
+    difficulty = hard_score + medium_score
+
+    # Diversity (max 20)
+    diversity = np.minimum(platforms_analyzed * 7, 20)
+
+    # Uniqueness (max 15)
+    uniqueness = np.select([unique_pct > 85, unique_pct > 70], [15, 10], default=5)
+
+    # int() truncates toward zero, as in the scalar code
+    score = np.minimum(np.trunc(volume + difficulty + diversity + uniqueness), 100).astype(np.int64)
+
+    return {
+        'score': score,
+        'grade': GRADES[_tiered(score, GRADE_THRESHOLDS)],
+        'percentile': percentile_ranks(score),
+        'breakdown': {
+            'volume': np.trunc(volume).astype(np.int64),
+            'difficulty': difficulty.astype(np.int64),
+            'diversity': np.trunc(diversity).astype(np.int64),
+            'uniqueness': uniqueness.astype(np.int64)
+        },
+        'level': LEVELS[_tiered(total, LEVEL_THRESHOLDS)],
+        'difficultyLevel': DIFFICULTY_LEVELS[_tiered(total, DIFFICULTY_LEVEL_THRESHOLDS)],
+        'difficultyPercentages': {
+            'easy': easy_pct,
+            'medium': medium_pct,
+            'hard': hard_pct
+        }
+    }
+
+
+# score_cohort() arguments, in cohort_row() order
+COHORT_COLUMNS = ('easy', 'medium', 'hard', 'total', 'unique', 'platforms_analyzed')
+
+
+def cohort_row(analysis: Dict) -> Tuple[float, ...]:
+    """The values score_cohort() needs from one analysis result, in COHORT_COLUMNS order"""
+    overall = analysis.get('overall', {})
+    stats = overall.get('stats', {})
+    return (
+        stats.get('easy') or 0, stats.get('medium') or 0, stats.get('hard') or 0,
+        stats.get('total') or 0, stats.get('unique') or 0, overall.get('platformsAnalyzed') or 0
+    )
+
+
+def _columns(rows: ArrayLike) -> Dict[str, np.ndarray]:
+    columns = np.asarray(rows, dtype=np.float64).reshape(-1, len(COHORT_COLUMNS)).T
+    return dict(zip(COHORT_COLUMNS, columns))
+
+
+def cohort_columns(analyses: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """Columnar score_cohort() arguments from analysis results"""
+    return _columns([cohort_row(analysis) for analysis in analyses])
+
+
+def cohort_summary(indexes: Sequence[int], rows: ArrayLike) -> Dict:
+    """
+    Cohort view of finished analyses: score distribution, grades, skill
+    levels and each entry's score and percentile within the cohort
+
+    `indexes` are the entries' positions in the request and `rows` their
+    cohort_row() values, as row tuples or one flat sequence, so callers
+    need not keep whole analyses. Analyses with no solved problems get no
+    insights in the scalar path and are left out.
+    """
+    columns = _columns(rows)
+    keep = columns['total'] > 0
+    kept = np.asarray(indexes, dtype=np.int64)[keep]
+    if not kept.size:
+        return {'scored': 0, 'score': None, 'grades': {}, 'levels': {}, 'ranks': []}
+
+    scored = score_cohort(**{name: column[keep] for name, column in columns.items()})
+    score = scored['score']
+
+    def distribution(labels: np.ndarray) -> Dict[str, int]:
+        values, counts = np.unique(labels, return_counts=True)
+        return {str(value): int(count) for value, count in zip(values, counts)}
+
+    return {
+        'scored': int(kept.size),
+        'score': {
+            'mean': round(float(score.mean()), 1),
+            'p50': float(np.percentile(score, 50)),
+            'p90': float(np.percentile(score, 90)),
+            'max': int(score.max())
+        },
+        'grades': distribution(scored['grade']),
+        'levels': distribution(scored['level']),
+        'ranks': [
+            {'index': int(index), 'score': int(s), 'grade': str(g), 'cohortPercentile': round(float(p), 1)}
+            for index, s, g, p in zip(kept, score, scored['grade'], scored['percentile'])
+        ]
+    }
@@ -3,39 +3,99 @@ Platform Analyser - Backend Services
 All scrapers, AI insights, and analysis logic in one file
 """
 
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import closing
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
 import re
 import math
-from tenacity import retry, stop_after_attempt, wait_exponential
+
+# Incremental JSON parsing for large CodeForces payloads
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+from http_client import HTTPTransport, http_transport
+from cache import ProfileCache
+from batching import MicroBatcher
+from problem_index import SolvedProblemIndex, canonical_problem_map, problem_interner
+from gfg_parser import parse_profile as parse_gfg_profile
+import metrics
+import tracing
+from logs import get_logger
+
+
+log = get_logger("services")
+
+
+# Max simultaneous upstream fetches per platform for the async engine
+PLATFORM_CONCURRENCY = {
+    'leetcode': int(os.getenv("LEETCODE_MAX_CONCURRENCY", "4")),
+    'codeforces': int(os.getenv("CODEFORCES_MAX_CONCURRENCY", "2")),
+    'gfg': int(os.getenv("GFG_MAX_CONCURRENCY", "4"))
+}
+
+# Extra scraper threads for batched lookups, which run outside the platform limits
+BATCH_LOOKUP_WORKERS = int(os.getenv("BATCH_LOOKUP_WORKERS", "16"))
+
+# Overall deadline (seconds) for one async multi-platform analysis
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "45"))
+
+# Recent accepted LeetCode submissions fetched for problem identifiers (LeetCode caps this at 20)
+LEETCODE_RECENT_AC_LIMIT = int(os.getenv("LEETCODE_RECENT_AC_LIMIT", "20"))
+
+# LeetCode GraphQL batching: max aliased users per query and how long (ms) a
+# lookup waits for concurrent lookups to join its batch
+LEETCODE_BATCH_SIZE = int(os.getenv("LEETCODE_BATCH_SIZE", "10"))
+LEETCODE_BATCH_WINDOW = float(os.getenv("LEETCODE_BATCH_WINDOW_MS", "10")) / 1000
+
+# CodeForces user.info batching: max handles per call and how long (ms) a
+# lookup waits for concurrent lookups to join its batch
+CODEFORCES_INFO_BATCH_SIZE = int(os.getenv("CODEFORCES_INFO_BATCH_SIZE", "100"))
+CODEFORCES_INFO_BATCH_WINDOW = float(os.getenv("CODEFORCES_INFO_BATCH_WINDOW_MS", "10")) / 1000
+
+# Parse CodeForces user.status incrementally instead of loading the whole array
+CODEFORCES_STREAM_PARSE = os.getenv("CODEFORCES_STREAM_PARSE", "1") == "1" and IJSON_AVAILABLE
 
 
 # ============================================================================
 # SCRAPERS
 # ============================================================================
 
+class UserNotFoundError(Exception):
+    """Raised by a scraper when the upstream platform has no such user"""
+
+
+class UpstreamResponseError(Exception):
+    """Raised when an upstream answers with an error instead of data (a transient failure, never "not found")"""
+
+
+def error_result(platform: str, username: str, error: Any) -> Dict:
+    """Failed fetch result; "not found" failures are flagged so they can be cached"""
+    result = {
+        'platform': platform,
+        'username': username,
+        'error': str(error),
+        'success': False
+    }
+    if isinstance(error, UserNotFoundError):
+        result['notFound'] = True
+    return result
+
+
 class LeetCodeScraper:
     """LeetCode GraphQL API Scraper"""
     
-    def __init__(self):
-        self.base_url = "https://leetcode.com/graphql"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Content-Type': 'application/json'
-        })
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def fetch_user_data(self, username: str) -> Dict:
-        """Fetch LeetCode user data"""
-        try:
-            # Query for user profile
-            profile_query = {
-                "query": """
-                    query getUserProfile($username: String!) {
-                        matchedUser(username: $username) {
+    # Selection set requested for every user (one alias per user in a batch)
+    USER_FIELDS = """
                             username
                             profile {
                                 realName
@@ -48,111 +108,324 @@ class LeetCodeScraper:
                                     count
                                 }
                             }
-                        }
-                    }
-                """,
-                "variables": {"username": username}
-            }
-            
-            response = self.session.post(self.base_url, json=profile_query, timeout=15)
+    """
+    
+    def __init__(self, transport: HTTPTransport = http_transport):
+        self.base_url = "https://leetcode.com/graphql"
+        self.http = transport
+        self.headers = {'Content-Type': 'application/json'}
+        # Concurrent single-user lookups share one aliased GraphQL query
+        self._batcher = MicroBatcher(
+            self.fetch_users_graph, LEETCODE_BATCH_SIZE, LEETCODE_BATCH_WINDOW
+        )
+    
+    def _build_batch_query(self, usernames: List[str]) -> Dict:
+        """One aliased query: u{i} is the profile, u{i}_recent its recent ACs"""
+        variables = {'limit': LEETCODE_RECENT_AC_LIMIT}
+        params = ['$limit: Int!']
+        fields = []
+        
+        for i, username in enumerate(usernames):
+            variables[f'u{i}'] = username
+            params.append(f'$u{i}: String!')
+            fields.append(f"""
+                        u{i}: matchedUser(username: $u{i}) {{{self.USER_FIELDS.rstrip()}
+                        }}
+                        u{i}_recent: recentAcSubmissionList(username: $u{i}, limit: $limit) {{
+                            titleSlug
+                        }}""")
+        
+        return {
+            "query": f"query getUserProfiles({', '.join(params)}) {{{''.join(fields)}\n                    }}",
+            "variables": variables
+        }
+    
+    def fetch_users_graph(self, usernames: List[str]) -> Dict[str, Any]:
+        """
+        Fetch raw GraphQL data for many users with aliased queries
+        
+        Returns {lower-cased username: {'user': ..., 'recent': [...]}}, or a
+        UserNotFoundError for aliases LeetCode resolves to null. A response
+        without data, or with errors not tied to a user's alias (a schema or
+        query error), raises UpstreamResponseError for the whole batch.
+        """
+        usernames = list(dict.fromkeys(u.lower() for u in usernames))
+        results: Dict[str, Any] = {}
+        
+        for start in range(0, len(usernames), LEETCODE_BATCH_SIZE):
+            batch = usernames[start:start + LEETCODE_BATCH_SIZE]
+            response = self.http.post(self.base_url, json=self._build_batch_query(batch), headers=self.headers)
             response.raise_for_status()
-            data = response.json()
-            
-            user_data = data.get('data', {}).get('matchedUser')
-            if not user_data:
-                raise Exception(f"User {username} not found")
+            payload = response.json()
+            data = payload.get('data')
+            errors = payload.get('errors') or []
             
-            # Parse submission stats
-            ac_submissions = user_data.get('submitStats', {}).get('acSubmissionNum', [])
+            aliases = {f'u{i}' for i in range(len(batch))} | {f'u{i}_recent' for i in range(len(batch))}
+            unscoped = [e for e in errors if not (isinstance(e, dict) and (e.get('path') or [None])[0] in aliases)]
+            if not isinstance(data, dict) or unscoped:
+                messages = '; '.join(str(e.get('message', e) if isinstance(e, dict) else e) for e in (unscoped or errors))
+                raise UpstreamResponseError(f"LeetCode GraphQL error: {messages or 'no data'}")
             
-            stats = {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0}
-            for submission in ac_submissions:
-                difficulty = submission.get('difficulty', '').lower()
-                count = submission.get('count', 0)
-                
-                if difficulty == 'easy':
-                    stats['easy'] = count
-                elif difficulty == 'medium':
-                    stats['medium'] = count
-                elif difficulty == 'hard':
-                    stats['hard'] = count
-                elif difficulty == 'all':
-                    stats['total'] = count
-            
-            profile = user_data.get('profile', {})
+            for i, username in enumerate(batch):
+                if f'u{i}' not in data:
+                    results[username] = UpstreamResponseError(f"LeetCode GraphQL response has no result for {username}")
+                    continue
+                user_data = data[f'u{i}']
+                if user_data is None:
+                    results[username] = UserNotFoundError(f"User {username} not found")
+                else:
+                    results[username] = {'user': user_data, 'recent': data.get(f'u{i}_recent') or []}
+        
+        return results
+    
+    def prefetch(self, username: str) -> Dict:
+        """
+        Batched part of a fetch, as keyword arguments for fetch_user_data
+        
+        Raises UserNotFoundError for unknown users.
+        """
+        return {'graph_data': self._batcher.get(username.lower())}
+    
+    def fetch_users_data(self, usernames: List[str]) -> Dict[str, Dict]:
+        """Batch counterpart of fetch_user_data: one GraphQL POST per batch of users"""
+        try:
+            graph = self.fetch_users_graph(usernames)
+        except Exception as e:
+            log.warning("LeetCode batch lookup failed", usernames=usernames, error=str(e))
+            return {username: error_result('leetcode', username, e) for username in usernames}
+        
+        results = {}
+        for username in usernames:
+            graph_data = graph.get(username.lower())
+            if isinstance(graph_data, Exception) or graph_data is None:
+                results[username] = error_result('leetcode', username, graph_data or UserNotFoundError(f"User {username} not found"))
+            else:
+                results[username] = self.fetch_user_data(username, graph_data=graph_data)
+        return results
+    
+    def fetch_user_data(self, username: str, graph_data: Optional[Dict] = None) -> Dict:
+        """Fetch LeetCode user data"""
+        try:
+            # Query for user profile, batched with any concurrent lookups unless supplied
+            if graph_data is None:
+                graph_data = self._batcher.get(username.lower())
             
-            return {
-                'platform': 'leetcode',
-                'username': username,
-                'name': profile.get('realName', username),
-                'avatar': profile.get('userAvatar', ''),
-                'stats': stats,
-                'reputation': profile.get('reputation', 0),
-                'success': True
-            }
+            user_data = graph_data['user']
             
+            with tracing.span('parse', platform='leetcode'):
+                # Parse submission stats
+                ac_submissions = user_data.get('submitStats', {}).get('acSubmissionNum', [])
+                
+                stats = {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0}
+                for submission in ac_submissions:
+                    difficulty = submission.get('difficulty', '').lower()
+                    count = submission.get('count', 0)
+                    
+                    if difficulty == 'easy':
+                        stats['easy'] = count
+                    elif difficulty == 'medium':
+                        stats['medium'] = count
+                    elif difficulty == 'hard':
+                        stats['hard'] = count
+                    elif difficulty == 'all':
+                        stats['total'] = count
+                
+                profile = user_data.get('profile', {})
+                
+                # Problem identifiers (titleSlugs) from recent accepted submissions
+                problem_ids = list(dict.fromkeys(s['titleSlug'] for s in graph_data['recent'] if s.get('titleSlug')))
+                
+                return {
+                    'platform': 'leetcode',
+                    'username': username,
+                    'name': profile.get('realName', username),
+                    'avatar': profile.get('userAvatar', ''),
+                    'stats': stats,
+                    'reputation': profile.get('reputation', 0),
+                    'problemIds': problem_ids,
+                    'success': True
+                }
+        
         except Exception as e:
-            print(f"LeetCode error for {username}: {str(e)}")
-            return {
-                'platform': 'leetcode',
-                'username': username,
-                'error': str(e),
-                'success': False
-            }
+            log.warning("LeetCode fetch failed", username=username, error=str(e))
+            return error_result('leetcode', username, e)
+
+
+class _ResponseReader:
+    """Minimal file-like view over an iterator of byte chunks, for ijson"""
+    
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b''
+    
+    def read(self, size: int = -1) -> bytes:
+        if not self._pending:
+            self._pending = next(self._chunks, b'')
+        
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b''
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+class SubmissionSyncStore:
+    """
+    In-memory per-handle CodeForces sync state
+    
+    State is {'lastSubmissionId': int, 'solved': {problem_id: rating}}. The
+    default store keeps the most recent handles in process; MongoSubmissionSyncStore
+    persists the same state so it survives restarts and is shared by workers.
+    """
+    
+    def __init__(self, max_handles: int = 1000):
+        self.max_handles = max_handles
+        self._states: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def load(self, handle: str) -> Optional[Dict]:
+        with self._lock:
+            state = self._states.get(handle.lower())
+            if state is None:
+                return None
+            self._states.move_to_end(handle.lower())
+            return {**state, 'solved': dict(state['solved'])}
+    
+    def save(self, handle: str, state: Dict):
+        with self._lock:
+            self._states[handle.lower()] = state
+            self._states.move_to_end(handle.lower())
+            while len(self._states) > self.max_handles:
+                self._states.popitem(last=False)
+
+
+class MongoSubmissionSyncStore(SubmissionSyncStore):
+    """Sync state persisted in a MongoDB collection, one document per handle"""
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    def load(self, handle: str) -> Optional[Dict]:
+        try:
+            doc = self.collection.find_one({'_id': handle.lower()})
+        except Exception as e:
+            log.warning("Failed to load CodeForces sync state", handle=handle, error=str(e))
+            return None
+        
+        if not doc:
+            return None
+        return {'lastSubmissionId': doc.get('lastSubmissionId', 0), 'solved': doc.get('solved', {})}
+    
+    def save(self, handle: str, state: Dict):
+        try:
+            self.collection.replace_one(
+                {'_id': handle.lower()},
+                {**state, 'updatedAt': datetime.now()},
+                upsert=True
+            )
+        except Exception as e:
+            log.warning("Failed to save CodeForces sync state", handle=handle, error=str(e))
 
 
 class CodeForcesScraper:
     """CodeForces API Scraper"""
     
-    def __init__(self):
+    # user.status page size for the first sync of a handle and for catch-up syncs
+    FULL_SYNC_PAGE_SIZE = 5000
+    INCREMENTAL_PAGE_SIZE = 100
+    
+    def __init__(self, transport: HTTPTransport = http_transport, sync_store: Optional[SubmissionSyncStore] = None):
         self.base_url = "https://codeforces.com/api"
-        self.session = requests.Session()
+        self.http = transport
+        self.sync_store = sync_store if sync_store is not None else SubmissionSyncStore()
+        # Concurrent single-handle lookups share one user.info call
+        self._info_batcher = MicroBatcher(
+            self.fetch_users_info, CODEFORCES_INFO_BATCH_SIZE, CODEFORCES_INFO_BATCH_WINDOW
+        )
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def fetch_user_data(self, username: str) -> Dict:
-        """Fetch CodeForces user data"""
-        try:
-            # Fetch user info
-            user_url = f"{self.base_url}/user.info?handles={username}"
-            user_response = self.session.get(user_url, timeout=15)
-            user_response.raise_for_status()
-            user_data = user_response.json()
+    def fetch_users_info(self, usernames: List[str]) -> Dict[str, Any]:
+        """
+        Resolve many handles with batched user.info calls
+        
+        Returns {lower-cased handle: user info dict}, or a UserNotFoundError
+        for handles CodeForces does not know. user.info rejects the whole
+        call when any handle is unknown, so those are dropped and retried.
+        """
+        remaining = list(dict.fromkeys(u.lower() for u in usernames))
+        infos: Dict[str, Any] = {}
+        
+        while remaining:
+            batch = remaining[:CODEFORCES_INFO_BATCH_SIZE]
+            response = self.http.get(f"{self.base_url}/user.info", params={'handles': ';'.join(batch)})
             
-            if user_data.get('status') != 'OK':
-                raise Exception(f"User {username} not found")
+            if response.status_code == 400:
+                match = re.search(r'User with handle (\S+) not found', response.text)
+                if match and match.group(1).lower() in batch:
+                    missing = match.group(1).lower()
+                    infos[missing] = UserNotFoundError(f"User {missing} not found")
+                    remaining.remove(missing)
+                    continue
             
-            user_info = user_data['result'][0]
+            response.raise_for_status()
+            data = response.json()
+            if data.get('status') != 'OK':
+                raise Exception(data.get('comment', 'user.info failed'))
             
-            # Fetch submissions
-            submissions_url = f"{self.base_url}/user.status?handle={username}&from=1&count=10000"
-            submissions_response = self.session.get(submissions_url, timeout=15)
-            submissions_response.raise_for_status()
-            submissions_data = submissions_response.json()
+            for info in data['result']:
+                infos[info.get('handle', '').lower()] = info
+            for handle in batch:
+                infos.setdefault(handle, UserNotFoundError(f"User {handle} not found"))
+            remaining = remaining[len(batch):]
+        
+        return infos
+    
+    def prefetch(self, username: str) -> Dict:
+        """
+        Batched part of a fetch, as keyword arguments for fetch_user_data
+        
+        Raises UserNotFoundError for unknown handles.
+        """
+        return {'user_info': self._info_batcher.get(username.lower())}
+    
+    def fetch_users_data(self, usernames: List[str]) -> Dict[str, Dict]:
+        """Batch counterpart of fetch_user_data: one user.info call for all handles"""
+        try:
+            infos = self.fetch_users_info(usernames)
+        except Exception as e:
+            log.warning("CodeForces batch lookup failed", usernames=usernames, error=str(e))
+            return {username: error_result('codeforces', username, e) for username in usernames}
+        
+        results = {}
+        for username in usernames:
+            info = infos.get(username.lower())
+            if isinstance(info, Exception) or info is None:
+                results[username] = error_result('codeforces', username, info or UserNotFoundError(f"User {username} not found"))
+            else:
+                results[username] = self.fetch_user_data(username, user_info=info)
+        return results
+    
+    def fetch_user_data(self, username: str, user_info: Optional[Dict] = None) -> Dict:
+        """Fetch CodeForces user data"""
+        try:
+            # User info, batched with any concurrent lookups unless supplied
+            if user_info is None:
+                user_info = self._info_batcher.get(username.lower())
             
-            if submissions_data.get('status') != 'OK':
-                raise Exception("Failed to fetch submissions")
+            # Bring the stored solved set up to date with new submissions only
+            with tracing.span('submission_sync', platform='codeforces') as sync_span:
+                solved_problems = self._sync_solved_problems(username)
+                sync_span.set(solved=len(solved_problems))
             
-            # Count accepted submissions by difficulty
-            submissions = submissions_data['result']
-            solved_problems = set()
+            # Count solved problems by difficulty
             difficulty_count = {'easy': 0, 'medium': 0, 'hard': 0}
-            
-            for submission in submissions:
-                if submission.get('verdict') == 'OK':
-                    problem = submission.get('problem', {})
-                    problem_id = f"{problem.get('contestId')}_{problem.get('index')}"
-                    
-                    if problem_id not in solved_problems:
-                        solved_problems.add(problem_id)
-                        
-                        # Classify by rating
-                        rating = problem.get('rating', 0)
-                        if rating < 1400:
-                            difficulty_count['easy'] += 1
-                        elif rating < 1900:
-                            difficulty_count['medium'] += 1
-                        else:
-                            difficulty_count['hard'] += 1
+            for rating in solved_problems.values():
+                # Classify by rating
+                if rating < 1400:
+                    difficulty_count['easy'] += 1
+                elif rating < 1900:
+                    difficulty_count['medium'] += 1
+                else:
+                    difficulty_count['hard'] += 1
             
             total = len(solved_problems)
             
@@ -169,31 +442,137 @@ class CodeForcesScraper:
                 },
                 'rating': user_info.get('rating', 0),
                 'rank': user_info.get('rank', 'unrated'),
+                'problemIds': list(solved_problems),
                 'success': True
             }
             
         except Exception as e:
-            print(f"CodeForces error for {username}: {str(e)}")
-            return {
-                'platform': 'codeforces',
-                'username': username,
-                'error': str(e),
-                'success': False
-            }
+            log.warning("CodeForces fetch failed", username=username, error=str(e))
+            return error_result('codeforces', username, e)
+    
+    # ijson prefixes of the only user.status fields the sync needs
+    SUBMISSION_FIELDS = {
+        'result.item.id': 'id',
+        'result.item.verdict': 'verdict',
+        'result.item.problem.contestId': 'contestId',
+        'result.item.problem.index': 'index',
+        'result.item.problem.rating': 'rating'
+    }
+    
+    def _iter_submissions(self, username: str, start: int, count: int):
+        """
+        Yield one page of user.status, newest first, as slim dicts
+        
+        Each submission is reduced to id, verdict, contestId, index and rating.
+        In streaming mode the body is parsed as it arrives, so memory stays
+        flat regardless of page size and stopping early skips the rest.
+        """
+        params = {'handle': username, 'from': start, 'count': count}
+        
+        if not CODEFORCES_STREAM_PARSE:
+            response = self.http.get(f"{self.base_url}/user.status", params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get('status') != 'OK':
+                raise Exception("Failed to fetch submissions")
+            
+            for submission in data['result']:
+                problem = submission.get('problem', {})
+                yield {
+                    'id': submission.get('id', 0),
+                    'verdict': submission.get('verdict'),
+                    'contestId': problem.get('contestId'),
+                    'index': problem.get('index'),
+                    'rating': problem.get('rating', 0)
+                }
+            return
+        
+        with self.http.stream('GET', f"{self.base_url}/user.status", params=params) as response:
+            response.raise_for_status()
+            
+            status = None
+            submission = None
+            for prefix, event, value in ijson.parse(_ResponseReader(response.iter_bytes())):
+                if prefix == 'result.item':
+                    if event == 'start_map':
+                        submission = {'id': 0, 'verdict': None, 'contestId': None, 'index': None, 'rating': 0}
+                    elif event == 'end_map':
+                        yield submission
+                        submission = None
+                elif submission is not None:
+                    field = self.SUBMISSION_FIELDS.get(prefix)
+                    if field is not None:
+                        submission[field] = value
+                elif prefix == 'status':
+                    status = value
+                elif prefix == 'result' and event == 'start_array' and status != 'OK':
+                    raise Exception("Failed to fetch submissions")
+            
+            if status != 'OK':
+                raise Exception("Failed to fetch submissions")
+    
+    def _sync_solved_problems(self, username: str) -> Dict[str, int]:
+        """
+        Merge submissions newer than the stored watermark into the solved set
+        
+        Pages are read newest-first until a submission at or below the last
+        seen id turns up. Submissions still being judged hold the watermark
+        back so their final verdict is picked up by the next sync.
+        """
+        state = self.sync_store.load(username) or {'lastSubmissionId': 0, 'solved': {}}
+        watermark = state['lastSubmissionId']
+        solved = state['solved']
+        
+        page_size = self.INCREMENTAL_PAGE_SIZE if watermark else self.FULL_SYNC_PAGE_SIZE
+        start = 1
+        newest_final = watermark
+        oldest_pending = None
+        changed = False
+        
+        while True:
+            reached_watermark = False
+            page_length = 0
+            
+            with closing(self._iter_submissions(username, start, page_size)) as page:
+                for submission in page:
+                    page_length += 1
+                    submission_id = submission['id']
+                    if submission_id <= watermark:
+                        reached_watermark = True
+                        break
+                    
+                    verdict = submission['verdict']
+                    if verdict in (None, 'TESTING'):
+                        oldest_pending = submission_id if oldest_pending is None else min(oldest_pending, submission_id)
+                        continue
+                    
+                    newest_final = max(newest_final, submission_id)
+                    if verdict == 'OK':
+                        problem_id = f"{submission['contestId']}_{submission['index']}"
+                        if problem_id not in solved:
+                            solved[problem_id] = submission['rating'] or 0
+                            changed = True
+            
+            if reached_watermark or page_length < page_size:
+                break
+            start += page_size
+        
+        new_watermark = newest_final if oldest_pending is None else min(newest_final, oldest_pending - 1)
+        if changed or new_watermark != watermark:
+            self.sync_store.save(username, {'lastSubmissionId': new_watermark, 'solved': solved})
+        
+        return solved
 
 
 class GFGScraper:
     """GeeksforGeeks Web Scraper"""
     
-    def __init__(self):
+    def __init__(self, transport: HTTPTransport = http_transport):
         self.base_url = "https://www.geeksforgeeks.org"
         self.api_url = "https://practiceapi.geeksforgeeks.org/api"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.http = transport
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def fetch_user_data(self, username: str) -> Dict:
         """Fetch GFG user data"""
         try:
@@ -206,7 +585,7 @@ class GFGScraper:
                 'Referer': f"{self.base_url}/user/{username}/"
             }
             
-            response = self.session.get(api_url, params=params, headers=headers, timeout=15)
+            response = self.http.get(api_url, params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -229,6 +608,7 @@ class GFGScraper:
                     'stats': stats,
                     'score': results.get('score', 0),
                     'institution': results.get('institution', ''),
+                    'problemIds': self._fetch_solved_slugs(username),
                     'success': True
                 }
             
@@ -236,48 +616,57 @@ class GFGScraper:
             return self._scrape_profile(username)
             
         except Exception as e:
-            print(f"GFG error for {username}: {str(e)}")
+            log.warning("GFG API fetch failed, scraping profile page", username=username, error=str(e))
             # Try web scraping as fallback
             try:
                 return self._scrape_profile(username)
+            except UserNotFoundError as not_found:
+                return error_result('gfg', username, not_found)
             except:
-                return {
-                    'platform': 'gfg',
-                    'username': username,
-                    'error': str(e),
-                    'success': False
-                }
+                return error_result('gfg', username, e)
+    
+    def _fetch_solved_slugs(self, username: str) -> List[str]:
+        """Slugs of solved problems; best effort, an empty list if unavailable"""
+        try:
+            response = self.http.post(
+                f"{self.api_url}/v1/user/problems/submissions/",
+                json={'handle': username, 'requestType': '', 'year': '', 'month': ''},
+                headers={'Accept': 'application/json', 'Referer': f"{self.base_url}/user/{username}/"}
+            )
+            response.raise_for_status()
+            by_difficulty = response.json().get('result') or {}
+        except Exception as e:
+            log.info("GFG solved problems unavailable", username=username, error=str(e))
+            return []
+        
+        # {difficulty: {problem_id: {'slug': ..., 'pname': ...}}}
+        slugs = []
+        for problems in by_difficulty.values():
+            if isinstance(problems, dict):
+                slugs.extend(p['slug'] for p in problems.values() if isinstance(p, dict) and p.get('slug'))
+        return list(dict.fromkeys(slugs))
     
     def _scrape_profile(self, username: str) -> Dict:
         """Scrape GFG profile page"""
         url = f"{self.base_url}/user/{username}/"
-        response = self.session.get(url, timeout=15)
+        response = self.http.get(url)
+        if response.status_code == 404:
+            raise UserNotFoundError(f"User {username} not found")
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Try to find problem count
-        total = 0
-        for elem in soup.find_all(['div', 'span'], class_=re.compile('problem|score|solved', re.I)):
-            text = elem.get_text()
-            numbers = re.findall(r'\d+', text)
-            if numbers:
-                total = max(total, int(numbers[0]))
-        
-        # Estimate distribution
-        stats = {
-            'easy': int(total * 0.45),
-            'medium': int(total * 0.40),
-            'hard': int(total * 0.15),
-            'total': total
-        }
+        # Embedded page state when present, else only the stat elements
+        with tracing.span('parse', platform='gfg', bytes=len(response.content)):
+            parsed = parse_gfg_profile(response.text)
         
         return {
             'platform': 'gfg',
             'username': username,
-            'name': username,
-            'avatar': '',
-            'stats': stats,
+            'name': parsed.get('name') or username,
+            'avatar': parsed.get('avatar', ''),
+            'stats': parsed['stats'],
+            'score': parsed.get('score', 0),
+            'institution': parsed.get('institution', ''),
+            'problemIds': parsed['problemIds'],
             'success': True
         }
 
@@ -761,6 +1150,68 @@ class AIInsightsService:
             return '🚀 Every expert was once a beginner. You\'ve started your journey - keep coding!'
 
 
+# ============================================================================
+# REQUEST COALESCING
+# ============================================================================
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls sharing a key
+    
+    The first caller for a key becomes the leader and does the work; callers
+    arriving while it is in flight wait on the leader's future instead of
+    repeating the upstream request. Works for both threads and coroutines.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Any, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {'leaders': 0, 'coalescedWaiters': 0}
+    
+    def claim(self, key: Any) -> Tuple[Future, bool]:
+        """Return the shared future for key and whether the caller leads"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._counters['coalescedWaiters'] += 1
+                return future, False
+            
+            future = Future()
+            self._calls[key] = future
+            self._counters['leaders'] += 1
+            return future, True
+    
+    def release(self, key: Any, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's outcome to every waiter"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def do(self, key: Any, fn, *args) -> Any:
+        """Blocking helper: run fn once per in-flight key"""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self.release(key, future, error=e)
+            raise
+        
+        self.release(key, future, result=result)
+        return result
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self._counters, 'inFlight': len(self._calls)}
+
+
 # ============================================================================
 # ANALYZER SERVICE
 # ============================================================================
@@ -774,6 +1225,17 @@ class AnalyzerService:
             'codeforces': CodeForcesScraper(),
             'gfg': GFGScraper()
         }
+        self.cache = ProfileCache()
+        self.inflight = SingleFlight()
+        # Scrapers are blocking, so the async engine runs them on a dedicated
+        # pool sized to the per-platform limits plus room for batched lookups
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(PLATFORM_CONCURRENCY.values()) + BATCH_LOOKUP_WORKERS,
+            thread_name_prefix="scraper"
+        )
+        self._limits_loop = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._background_tasks = set()
     
     def parse_username(self, url_or_username: str, platform: str) -> str:
         """Extract username from URL or return username"""
@@ -799,22 +1261,27 @@ class AnalyzerService:
         
         return url_or_username
     
-    def analyze_multiple_platforms(self, profiles: Dict[str, Any]) -> Dict:
-        """Analyze profiles from multiple platforms with multiple accounts support"""
-        results = {
-            'platforms': {},
-            'overall': {
-                'stats': {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0, 'unique': 0},
-                'uniqueProblems': 0,
-                'duplicates': 0,
-                'platformsAnalyzed': 0,
-                'totalAccounts': 0
-            },
-            'duplicateAnalysis': None,
-            'timestamp': datetime.now().isoformat()
-        }
+    def normalize_profiles(self, profiles: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Profiles as {platform: sorted lower-cased usernames}, URLs reduced to usernames"""
+        normalized = {}
+        for platform, username, _ in self._collect_accounts(profiles):
+            normalized.setdefault(platform, []).append(username.lower())
+        return {platform: sorted(usernames) for platform, usernames in normalized.items()}
+    
+    def profile_set_hash(self, profiles: Dict[str, Any]) -> str:
+        """
+        Stable hash of a normalized profile set
+        
+        Ordering and letter case are ignored, so equivalent requests share
+        one hash.
+        """
+        canonical = json.dumps(self.normalize_profiles(profiles), sort_keys=True)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    def _collect_accounts(self, profiles: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """Flatten profiles into (platform, username, account_key) tuples"""
+        accounts = []
         
-        # Fetch data from each platform
         for platform, urls_or_usernames in profiles.items():
             if not urls_or_usernames or platform not in self.scrapers:
                 continue
@@ -823,63 +1290,287 @@ class AnalyzerService:
             username_list = urls_or_usernames if isinstance(urls_or_usernames, list) else [urls_or_usernames]
             username_list = [u for u in username_list if u and u.strip()]
             
-            if not username_list:
-                continue
-            
-            # Fetch data for each username
             for url_or_username in username_list:
                 username = self.parse_username(url_or_username, platform)
                 
-                try:
-                    data = self.scrapers[platform].fetch_user_data(username)
-                    
-                    # Store with unique key for multiple accounts
-                    account_key = f"{platform}_{username}" if len(username_list) > 1 else platform
-                    results['platforms'][account_key] = data
-                    results['overall']['platformsAnalyzed'] += 1
-                    results['overall']['totalAccounts'] += 1
-                    
-                    # Add to overall stats
-                    if data.get('success') and data.get('stats'):
-                        stats = data['stats']
-                        results['overall']['stats']['easy'] += stats.get('easy', 0)
-                        results['overall']['stats']['medium'] += stats.get('medium', 0)
-                        results['overall']['stats']['hard'] += stats.get('hard', 0)
-                        results['overall']['stats']['total'] += stats.get('total', 0)
-                
-                except Exception as e:
-                    print(f"Error analyzing {platform} for {username}: {str(e)}")
-                    account_key = f"{platform}_{username}" if len(username_list) > 1 else platform
-                    results['platforms'][account_key] = {
-                        'platform': platform,
-                        'username': username,
-                        'error': str(e),
-                        'success': False
-                    }
-        
-        # Duplicate detection (simplified - 30% overlap estimate)
+                # Store with unique key for multiple accounts
+                account_key = f"{platform}_{username}" if len(username_list) > 1 else platform
+                accounts.append((platform, username, account_key))
+        
+        return accounts
+    
+    @staticmethod
+    def _empty_results() -> Dict:
+        return {
+            'platforms': {},
+            'overall': {
+                'stats': {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0, 'unique': 0},
+                'uniqueProblems': 0,
+                'duplicates': 0,
+                'platformsAnalyzed': 0,
+                'totalAccounts': 0
+            },
+            'duplicateAnalysis': None,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def _add_account_result(results: Dict, index: SolvedProblemIndex, account_key: str, data: Dict):
+        """Record one account's data and add it to the overall stats and problem index"""
+        problem_ids = data.get('problemIds')
+        if problem_ids is not None:
+            # Identifiers feed the index only; they are not part of the response
+            data = {k: v for k, v in data.items() if k != 'problemIds'}
+            if data.get('success'):
+                index.add(data['platform'], account_key, problem_ids)
+        
+        results['platforms'][account_key] = data
+        results['overall']['platformsAnalyzed'] += 1
+        results['overall']['totalAccounts'] += 1
+        
+        if data.get('success') and data.get('stats'):
+            stats = data['stats']
+            results['overall']['stats']['easy'] += stats.get('easy', 0)
+            results['overall']['stats']['medium'] += stats.get('medium', 0)
+            results['overall']['stats']['hard'] += stats.get('hard', 0)
+            results['overall']['stats']['total'] += stats.get('total', 0)
+    
+    @staticmethod
+    def _finalize_results(results: Dict, index: SolvedProblemIndex) -> Dict:
+        """Compute duplicate statistics and AI insights once all accounts are in"""
+        # Duplicate detection from the solved-problem index. Overlap is exact
+        # for identified problems; accounts whose identifiers only cover part
+        # of their total (e.g. LeetCode recent submissions) give a lower bound.
+        # The canonical problem map also merges the same task across platforms.
         total_problems = results['overall']['stats']['total']
-        unique_problems = int(total_problems * 0.70)  # Assume 30% overlap
+        by_platform = index.platform_overlap()
+        overall_overlap = index.cross_platform_overlap(canonical_problem_map)
+        same_platform_duplicates = sum(p['duplicates'] for p in by_platform.values())
+        duplicates = overall_overlap['duplicates']
+        identified = overall_overlap['identifiedProblems']
+        unique_problems = total_problems - duplicates
         
         results['overall']['stats']['unique'] = unique_problems
         results['overall']['uniqueProblems'] = unique_problems
-        results['overall']['duplicates'] = total_problems - unique_problems
+        results['overall']['duplicates'] = duplicates
         
         results['duplicateAnalysis'] = {
             'totalProblems': total_problems,
             'estimatedUniqueProblems': unique_problems,
-            'estimatedDuplicates': total_problems - unique_problems,
-            'overlapPercentage': 30.0
+            'estimatedDuplicates': duplicates,
+            'overlapPercentage': round(duplicates / total_problems * 100, 1) if total_problems > 0 else 0.0,
+            'coverage': round(min(identified / total_problems, 1.0) * 100, 1) if total_problems > 0 else 0.0,
+            'byPlatform': by_platform,
+            'crossPlatformDuplicates': duplicates - same_platform_duplicates,
+            'problemMapVersion': canonical_problem_map.version
         }
         
         # Generate AI insights
         try:
-            results['aiInsights'] = AIInsightsService.generate_insights(results)
+            with metrics.INSIGHTS_SECONDS.time(), tracing.span('insights'):
+                results['aiInsights'] = AIInsightsService.generate_insights(results)
         except Exception as e:
-            print(f"AI insights generation failed: {str(e)}")
+            log.warning("AI insights generation failed", error=str(e))
             results['aiInsights'] = None
         
         return results
+    
+    def analyze_multiple_platforms(self, profiles: Dict[str, Any]) -> Dict:
+        """Analyze profiles from multiple platforms with multiple accounts support"""
+        results = self._empty_results()
+        index = SolvedProblemIndex(problem_interner)
+        accounts = self._collect_accounts(profiles)
+        prefetched = self._prefetch_batches(accounts)
+        
+        # Fetch remaining data for each account, one at a time
+        for platform, username, account_key in accounts:
+            try:
+                data = prefetched.get((platform, username)) or self._fetch_account(platform, username)
+            except Exception as e:
+                log.warning("Account analysis failed", platform=platform, username=username, error=str(e))
+                data = error_result(platform, username, e)
+            
+            self._add_account_result(results, index, account_key, data)
+        
+        return self._finalize_results(results, index)
+    
+    def _prefetch_batches(self, accounts: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """
+        Resolve uncached accounts on batch-capable platforms with one call each
+        
+        The async path does not need this: its concurrent fetches are merged
+        by the scrapers' micro-batchers.
+        """
+        prefetched = {}
+        for platform, scraper in self.scrapers.items():
+            if not hasattr(scraper, 'fetch_users_data'):
+                continue
+            
+            usernames = list(dict.fromkeys(
+                username for p, username, _ in accounts
+                if p == platform and not self.cache.contains(platform, username)
+            ))
+            if len(usernames) < 2:
+                continue
+            
+            for username, data in scraper.fetch_users_data(usernames).items():
+                self.cache.set(platform, username, data)
+                prefetched[(platform, username)] = data
+        return prefetched
+    
+    def _platform_limit(self, platform: str) -> asyncio.Semaphore:
+        """Per-platform semaphore, recreated if the running event loop changes"""
+        loop = asyncio.get_running_loop()
+        if self._limits_loop is not loop:
+            self._limits_loop = loop
+            self._limits = {
+                name: asyncio.Semaphore(limit)
+                for name, limit in PLATFORM_CONCURRENCY.items()
+            }
+        return self._limits[platform]
+    
+    def _fetch_uncached(self, platform: str, username: str, prefetched: Optional[Dict] = None) -> Dict:
+        start = time.perf_counter()
+        network_before = metrics.network_time()
+        
+        with tracing.span('fetch', platform=platform) as fetch_span:
+            data = self.scrapers[platform].fetch_user_data(username, **(prefetched or {}))
+            fetch_span.set(success=bool(data.get('success')))
+        
+        elapsed = time.perf_counter() - start
+        network = metrics.network_time() - network_before
+        outcome = 'success' if data.get('success') else 'not_found' if data.get('notFound') else 'error'
+        metrics.PLATFORM_FETCH_SECONDS.labels(platform, outcome).observe(elapsed)
+        metrics.PLATFORM_FETCH_STAGE_SECONDS.labels(platform, 'network').observe(network)
+        metrics.PLATFORM_FETCH_STAGE_SECONDS.labels(platform, 'processing').observe(max(elapsed - network, 0.0))
+        
+        self.cache.set(platform, username, data)
+        return data
+    
+    def _fetch_account(self, platform: str, username: str) -> Dict:
+        """Fetch one account through the result cache and single-flight"""
+        cached = self.cache.get(platform, username)
+        if cached is not None:
+            return cached
+        
+        key = self.cache.make_key(platform, username)
+        return dict(self.inflight.do(key, self._fetch_uncached, platform, username))
+    
+    async def _fetch_account_async(self, platform: str, username: str) -> Dict:
+        with tracing.span('account', platform=platform, username=username) as account_span:
+            return await self._fetch_account_traced(platform, username, account_span)
+    
+    async def _fetch_account_traced(self, platform: str, username: str, account_span) -> Dict:
+        # Serve cache hits straight from the event loop, no thread hop
+        cached = self.cache.get(platform, username)
+        if cached is not None:
+            account_span.set(cache='hit')
+            return cached
+        
+        key = self.cache.make_key(platform, username)
+        future, leader = self.inflight.claim(key)
+        # A follower waits on the fetch another request is already running
+        account_span.set(cache='miss' if leader else 'joined')
+        if leader:
+            # Detached so a caller hitting its deadline never fails the waiters
+            task = asyncio.ensure_future(self._lead_fetch_async(key, future, platform, username))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        
+        shared = asyncio.wrap_future(future)
+        # Mark the outcome as retrieved even if this caller gives up first
+        shared.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return dict(await asyncio.shield(shared))
+    
+    async def _lead_fetch_async(self, key: Tuple[str, str], future: Future, platform: str, username: str):
+        scraper = self.scrapers[platform]
+        loop = asyncio.get_running_loop()
+        try:
+            # Batched lookups run before taking a platform slot, so lookups from
+            # every queued request can land in the same upstream call
+            prefetched = None
+            if hasattr(scraper, 'prefetch'):
+                start = time.perf_counter()
+                try:
+                    # The batch's upstream call is traced by whichever request leads it
+                    with tracing.span('batch_lookup', platform=platform):
+                        prefetched = await loop.run_in_executor(self._executor, tracing.bind(scraper.prefetch), username)
+                except UserNotFoundError as e:
+                    data = error_result(platform, username, e)
+                    self.cache.set(platform, username, data)
+                    self.inflight.release(key, future, result=data)
+                    return
+                finally:
+                    metrics.PLATFORM_FETCH_STAGE_SECONDS.labels(platform, 'batch_lookup').observe(time.perf_counter() - start)
+            
+            queued_at = time.perf_counter()
+            async with self._platform_limit(platform):
+                metrics.PLATFORM_FETCH_STAGE_SECONDS.labels(platform, 'slot_wait').observe(time.perf_counter() - queued_at)
+                tracing.record('slot_wait', queued_at, platform=platform)
+                data = await loop.run_in_executor(
+                    self._executor, tracing.bind(self._fetch_uncached), platform, username, prefetched
+                )
+        except BaseException as e:
+            self.inflight.release(key, future, error=e)
+            return
+        
+        self.inflight.release(key, future, result=data)
+    
+    def stats(self) -> Dict:
+        """Cache and request-coalescing counters"""
+        return {
+            'cache': self.cache.stats(),
+            'singleFlight': self.inflight.stats(),
+            'batching': {
+                'leetcodeGraphQL': self.scrapers['leetcode']._batcher.stats(),
+                'codeforcesUserInfo': self.scrapers['codeforces']._info_batcher.stats()
+            }
+        }
+    
+    async def analyze_multiple_platforms_async(
+        self,
+        profiles: Dict[str, Any],
+        deadline: Optional[float] = None
+    ) -> Dict:
+        """
+        Async counterpart of analyze_multiple_platforms
+        
+        All accounts are fetched concurrently (bounded per platform), so the
+        request takes as long as the slowest fetch. Accounts still pending
+        when the deadline expires are reported as failed.
+        """
+        deadline = ANALYSIS_DEADLINE_SECONDS if deadline is None else deadline
+        accounts = self._collect_accounts(profiles)
+        results = self._empty_results()
+        index = SolvedProblemIndex(problem_interner)
+        
+        tasks = [
+            asyncio.ensure_future(self._fetch_account_async(platform, username))
+            for platform, username, _ in accounts
+        ]
+        
+        pending = set()
+        if tasks:
+            with metrics.ANALYSES_IN_FLIGHT.track_inprogress():
+                _, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+        
+        with tracing.span('aggregate', accounts=len(accounts), timedOut=len(pending)):
+            for (platform, username, account_key), task in zip(accounts, tasks):
+                if task in pending:
+                    log.warning("Account analysis timed out", platform=platform, username=username, deadline=deadline)
+                    data = error_result(platform, username, f"Timed out after {deadline:g}s")
+                elif task.exception() is not None:
+                    e = task.exception()
+                    log.warning("Account analysis failed", platform=platform, username=username, error=str(e))
+                    data = error_result(platform, username, e)
+                else:
+                    data = task.result()
+                
+                self._add_account_result(results, index, account_key, data)
+            
+            return self._finalize_results(results, index)
 
 
 # Singleton instance
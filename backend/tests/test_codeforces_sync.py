@@ -0,0 +1,159 @@
+"""
+Incremental CodeForces sync must reach the same solved set as a full scan
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+
+import services
+from services import CodeForcesScraper, SubmissionSyncStore
+
+
+def submission(submission_id: int, problem: str, verdict='OK', rating=1200) -> dict:
+    contest, index = problem.split('_')
+    return {
+        'id': submission_id,
+        'verdict': verdict,
+        'problem': {'contestId': int(contest), 'index': index, 'rating': rating}
+    }
+
+
+class FakeResponse:
+    def __init__(self, payload: dict):
+        self.body = json.dumps(payload).encode()
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+    def iter_bytes(self):
+        for i in range(0, len(self.body), 64):
+            yield self.body[i:i + 64]
+
+
+class FakeTransport:
+    """user.status over a newest-first submission list, recording each page request"""
+
+    def __init__(self, submissions):
+        self.submissions = list(submissions)
+        self.pages = []
+        self.fail_at = None
+
+    def _page(self, params: dict) -> FakeResponse:
+        start, count = params['from'], params['count']
+        self.pages.append((start, count))
+        if start == self.fail_at:
+            raise ConnectionError("connection reset")
+        return FakeResponse({'status': 'OK', 'result': self.submissions[start - 1:start - 1 + count]})
+
+    def get(self, url, params=None, **kwargs):
+        return self._page(params)
+
+    @contextmanager
+    def stream(self, method, url, params=None, **kwargs):
+        yield self._page(params)
+
+    def add(self, *newer):
+        """Submissions made since the last sync, newest first"""
+        self.submissions[:0] = newer
+
+
+def full_scan(submissions) -> dict:
+    solved = {}
+    for s in reversed(submissions):
+        if s['verdict'] == 'OK':
+            solved.setdefault(f"{s['problem']['contestId']}_{s['problem']['index']}", s['problem']['rating'])
+    return solved
+
+
+@pytest.fixture(params=[False, True], ids=['json', 'stream'])
+def scraper_for(request, monkeypatch):
+    if request.param:
+        pytest.importorskip('ijson')
+    monkeypatch.setattr(services, 'CODEFORCES_STREAM_PARSE', request.param)
+
+    def build(transport):
+        scraper = CodeForcesScraper(transport=transport, sync_store=SubmissionSyncStore())
+        scraper.FULL_SYNC_PAGE_SIZE = 4
+        scraper.INCREMENTAL_PAGE_SIZE = 2
+        return scraper
+
+    return build
+
+
+def history() -> list:
+    # Newest first, as user.status returns them; 1000_B is solved on a retry
+    return [
+        submission(10, '1003_A', rating=1500),
+        submission(9, '1002_C', verdict='WRONG_ANSWER'),
+        submission(8, '1002_B', rating=1400),
+        submission(7, '1000_B', rating=900),
+        submission(6, '1002_A', rating=800),
+        submission(5, '1001_A', verdict='TIME_LIMIT_EXCEEDED'),
+        submission(4, '1000_B', verdict='WRONG_ANSWER', rating=900),
+        submission(3, '1000_A', rating=800)
+    ]
+
+
+def test_cold_start_scans_everything(scraper_for):
+    transport = FakeTransport(history())
+    scraper = scraper_for(transport)
+
+    assert scraper._sync_solved_problems('tourist') == full_scan(transport.submissions)
+    # Two full pages, then the empty one that shows the end
+    assert transport.pages == [(1, 4), (5, 4), (9, 4)]
+    assert scraper.sync_store.load('tourist')['lastSubmissionId'] == 10
+
+
+def test_second_sync_fetches_only_new_submissions(scraper_for):
+    transport = FakeTransport(history())
+    scraper = scraper_for(transport)
+    first = dict(scraper._sync_solved_problems('tourist'))
+
+    transport.pages.clear()
+    assert scraper._sync_solved_problems('tourist') == first
+    assert transport.pages == [(1, 2)]
+
+    transport.add(submission(12, '1004_A', rating=1700), submission(11, '1003_A', rating=1500))
+    transport.pages.clear()
+    solved = scraper._sync_solved_problems('tourist')
+    # Both new submissions fill the first page; the watermark shows up on the second
+    assert transport.pages == [(1, 2), (3, 2)]
+    assert solved == {**first, '1004_A': 1700} == full_scan(transport.submissions)
+    assert scraper.sync_store.load('tourist')['lastSubmissionId'] == 12
+
+
+def test_sync_resumes_after_a_partial_page(scraper_for):
+    transport = FakeTransport(history())
+    scraper = scraper_for(transport)
+    scraper._sync_solved_problems('tourist')
+
+    # Three new submissions, the oldest still being judged
+    transport.add(
+        submission(13, '1005_A', rating=2000),
+        submission(12, '1004_A', rating=1700),
+        submission(11, '1004_B', verdict='TESTING', rating=1900)
+    )
+    transport.fail_at = 3
+    transport.pages.clear()
+    with pytest.raises(ConnectionError):
+        scraper._sync_solved_problems('tourist')
+    # Nothing from the unfinished sync was saved
+    assert scraper.sync_store.load('tourist')['lastSubmissionId'] == 10
+
+    transport.fail_at = None
+    solved = scraper._sync_solved_problems('tourist')
+    assert solved == full_scan(transport.submissions)
+    # Held below the pending submission so its verdict is read next time
+    assert scraper.sync_store.load('tourist')['lastSubmissionId'] == 10
+
+    transport.submissions[2] = submission(11, '1004_B', rating=1900)
+    transport.pages.clear()
+    solved = scraper._sync_solved_problems('tourist')
+    assert solved == full_scan(transport.submissions)
+    assert '1004_B' in solved
+    assert scraper.sync_store.load('tourist')['lastSubmissionId'] == 13
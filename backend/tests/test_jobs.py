@@ -0,0 +1,61 @@
+"""
+A set finished twice after a reclaimed lease is counted once
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from jobs import LocalJobStore, MongoJobStore
+
+mongomock = pytest.importorskip('mongomock')
+
+
+class AsyncCollection:
+    """The async surface MongoJobStore uses, over a mongomock collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def with_options(self, **kwargs):
+        return AsyncCollection(self.collection.with_options(**kwargs))
+
+    async def insert_one(self, doc):
+        return self.collection.insert_one(doc)
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return self.collection.update_one(*args, **kwargs)
+
+
+def job() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        '_id': 'job', 'dedupKey': 'key', 'lane': 'bulk', 'status': 'running', 'refresh': False,
+        'profileSets': [{}, {}], 'total': 2, 'completed': 0, 'failed': 0, 'results': {}, 'error': None,
+        'createdAt': now, 'startedAt': now, 'finishedAt': None, 'leaseUntil': now, 'expiresAt': None
+    }
+
+
+@pytest.mark.parametrize('make_store', [
+    LocalJobStore,
+    lambda: MongoJobStore(AsyncCollection(mongomock.MongoClient().db.jobs))
+])
+def test_reclaimed_set_is_counted_once(make_store):
+    store = make_store()
+    lease_until = datetime.now(timezone.utc) + timedelta(seconds=120)
+
+    async def scenario():
+        await store.insert(job())
+        # The original worker and the one that reclaimed its lease both finish set 0
+        await store.record_result('job', 0, {'index': 0, 'success': False, 'error': 'late'}, lease_until)
+        await store.record_result('job', 0, {'index': 0, 'success': True, 'analysis': {}}, lease_until)
+        await store.record_result('job', 1, {'index': 1, 'success': True, 'analysis': {}}, lease_until)
+        return await store.get('job')
+
+    stored = asyncio.run(scenario())
+    assert (stored['completed'], stored['failed']) == (2, 1)
+    assert stored['results']['0']['error'] == 'late'
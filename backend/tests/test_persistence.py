@@ -0,0 +1,55 @@
+"""
+Read-through must never serve back an analysis with a transient account failure
+"""
+
+import asyncio
+
+import pytest
+
+from persistence import analysis_complete, analysis_document, find_recent_analysis
+
+mongomock = pytest.importorskip('mongomock')
+
+
+class AsyncCollection:
+    """The async find_one/insert_one surface of a mongomock collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert_one(self, doc):
+        return self.collection.insert_one(doc)
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+
+def analysis(**platforms) -> dict:
+    return {'platforms': platforms, 'overall': {}, 'timestamp': 'now'}
+
+
+OK = {'platform': 'leetcode', 'username': 'alice', 'success': True, 'stats': {'total': 10}}
+UNKNOWN = {'platform': 'gfg', 'username': 'nobody', 'success': False, 'notFound': True, 'error': 'User nobody not found'}
+TIMED_OUT = {'platform': 'codeforces', 'username': 'bob', 'success': False, 'error': 'Timed out after 20s'}
+
+
+def test_only_success_and_not_found_count_as_complete():
+    assert analysis_complete(analysis(leetcode=OK, gfg=UNKNOWN))
+    assert not analysis_complete(analysis(leetcode=OK, codeforces=TIMED_OUT))
+
+
+def test_failed_fetch_is_not_served_back():
+    collection = AsyncCollection(mongomock.MongoClient().db.analyses)
+
+    async def scenario():
+        await collection.insert_one(analysis_document(analysis(leetcode=OK, codeforces=TIMED_OUT), 'degraded'))
+        await collection.insert_one(analysis_document(analysis(leetcode=OK, gfg=UNKNOWN), 'good'))
+        return (
+            await find_recent_analysis(collection, 'degraded', 600),
+            await find_recent_analysis(collection, 'good', 600)
+        )
+
+    degraded, good = asyncio.run(scenario())
+    assert degraded is None
+    assert good is not None and set(good['platforms']) == {'leetcode', 'gfg'}
+    assert 'complete' not in good
@@ -0,0 +1,55 @@
+"""
+Only complete analyses with a successful account are ranked
+"""
+
+import asyncio
+
+from ranking import RankIndex, rank_values
+
+
+def analysis(total: int, hard: int, **platforms) -> dict:
+    return {
+        'platforms': platforms,
+        'overall': {'platformsAnalyzed': len(platforms), 'stats': {'total': total, 'hard': hard}}
+    }
+
+
+OK = {'success': True}
+UNKNOWN = {'success': False, 'notFound': True}
+TIMED_OUT = {'success': False, 'error': 'Timed out after 20s'}
+
+
+def record_all(index: RankIndex, *recorded):
+    async def scenario():
+        await index.start()
+        for profile_hash, result in recorded:
+            index.record(profile_hash, result)
+        await index.stop()
+
+    asyncio.run(scenario())
+
+
+def test_all_failed_analysis_is_not_ranked():
+    failed = analysis(0, 0, leetcode=TIMED_OUT, gfg=UNKNOWN)
+    assert rank_values(failed) is None
+    assert rank_values(analysis(0, 0, gfg=UNKNOWN)) is None
+
+    index = RankIndex()
+    record_all(index, ('a', failed))
+    assert index.stats()['total'] == 0
+    assert index.percentiles(failed) is None
+
+
+def test_degraded_analysis_keeps_stored_values():
+    index = RankIndex()
+    record_all(
+        index,
+        ('a', analysis(300, 40, leetcode=OK, codeforces=OK)),
+        ('b', analysis(100, 5, leetcode=OK, gfg=UNKNOWN)),
+        ('a', analysis(120, 10, leetcode=OK, codeforces=TIMED_OUT))
+    )
+
+    stats = index.stats()
+    assert stats['total'] == 2 and stats['applied'] == 2
+    assert index.trees['total'].at_or_below(299) == 1
+    assert index.trees['total'].at_or_below(300) == 2
@@ -0,0 +1,173 @@
+"""
+Circuit breaker transitions and retry waits, driven by a fake clock
+"""
+
+import httpx
+import pytest
+
+import resilience
+from http_client import HTTPTransport
+from ratelimit import RateLimitExceeded
+from resilience import (
+    RETRY_AFTER_MAX_SECONDS,
+    RETRY_ATTEMPTS,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryableHTTPError,
+    retry_policy
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', fake.monotonic)
+    return fake
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('codeforces.com', failure_threshold=3, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats()['consecutiveFailures'] == 0
+
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29.9
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker('codeforces.com', failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_for_a_full_timeout(clock):
+    breaker = CircuitBreaker('codeforces.com', failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_release_frees_the_probe_without_a_verdict(clock):
+    breaker = CircuitBreaker('codeforces.com', failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # The next call is the probe
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class ThrottledLimiter:
+    def acquire(self, host: str):
+        raise RateLimitExceeded(f"{host} rate limit")
+
+
+def test_transport_releases_breaker_on_non_transport_errors(clock):
+    transport = HTTPTransport(pools={}, rate_limiter=ThrottledLimiter(), replay_url=None)
+    transport.client_for('https://codeforces.com/api')
+    breaker = transport._breakers['codeforces.com']
+    breaker.failure_threshold = 1
+    open_breaker(breaker)
+    clock.now += breaker.reset_timeout
+
+    for _ in range(3):
+        with pytest.raises(RateLimitExceeded):
+            transport.get('https://codeforces.com/api/user.info')
+    # Throttled locally: the upstream never answered, so no failure was recorded
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.stats()['consecutiveFailures'] == 1
+    transport.close()
+
+
+def upstream_error(status_code: int, retry_after=None) -> RetryableHTTPError:
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    request = httpx.Request('GET', 'https://codeforces.com/api/user.info')
+    return RetryableHTTPError(httpx.Response(status_code, headers=headers, request=request))
+
+
+def run_with_policy(clock: FakeClock, errors: list):
+    policy = retry_policy()
+    policy.sleep = clock.sleep
+    calls = []
+
+    for attempt in policy:
+        with attempt:
+            calls.append(clock.now)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+    return calls
+
+
+def test_retry_waits_for_retry_after(clock):
+    calls = run_with_policy(clock, [upstream_error(429, '2'), upstream_error(503, '0')])
+    assert clock.sleeps == [2.0, 0.0]
+    assert len(calls) == 3
+
+
+def test_retry_after_beyond_limit_is_not_retried(clock):
+    with pytest.raises(RetryableHTTPError):
+        run_with_policy(clock, [upstream_error(503, str(RETRY_AFTER_MAX_SECONDS + 1))])
+    assert clock.sleeps == []
+
+
+def test_retries_stop_after_attempts(clock):
+    with pytest.raises(RetryableHTTPError):
+        run_with_policy(clock, [upstream_error(502)] * RETRY_ATTEMPTS)
+    assert len(clock.sleeps) == RETRY_ATTEMPTS - 1
+    # No Retry-After: jittered exponential backoff, capped
+    assert all(0 <= wait <= resilience.RETRY_BACKOFF_MAX_SECONDS for wait in clock.sleeps)
+
+
+def test_client_errors_are_not_retried(clock):
+    with pytest.raises(ValueError):
+        run_with_policy(clock, [ValueError("unparseable body")])
+    assert clock.sleeps == []
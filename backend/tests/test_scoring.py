@@ -0,0 +1,106 @@
+"""
+scoring.score_cohort() must match AIInsightsService's scalar scoring exactly
+"""
+
+import random
+from array import array
+
+import pytest
+
+from scoring import cohort_columns, cohort_row, cohort_summary, score_cohort
+from services import AIInsightsService
+
+
+def random_overall(rng: random.Random) -> dict:
+    total = rng.choice([
+        rng.randint(0, 60),
+        rng.randint(0, 600),
+        rng.randint(0, 3000),
+        rng.choice([0, 1, 49, 50, 149, 150, 299, 300, 499, 500])
+    ])
+    hard = rng.randint(0, total)
+    medium = rng.randint(0, total - hard)
+    easy = total - hard - medium
+    return {
+        'stats': {
+            'easy': easy,
+            'medium': medium,
+            'hard': hard,
+            'total': total,
+            'unique': rng.randint(0, total)
+        },
+        'platformsAnalyzed': rng.randint(0, 6)
+    }
+
+
+def boundary_overalls() -> list:
+    """Percentages landing exactly on the scalar code's thresholds"""
+    cases = []
+    for hard in (5, 15, 25):
+        for medium in (30, 40, 60):
+            for unique in (70, 85):
+                stats = {'easy': 100 - hard - medium, 'medium': medium, 'hard': hard, 'total': 100, 'unique': unique}
+                cases.append({'stats': stats, 'platformsAnalyzed': 2})
+    return cases
+
+
+@pytest.fixture(scope='module')
+def overalls() -> list:
+    rng = random.Random(20240)
+    return [random_overall(rng) for _ in range(20000)] + boundary_overalls()
+
+
+def test_score_cohort_matches_scalar_scoring(overalls):
+    scored = score_cohort(**cohort_columns({'overall': overall} for overall in overalls))
+
+    for i, overall in enumerate(overalls):
+        expected = AIInsightsService._calculate_score({}, overall)
+        assert int(scored['score'][i]) == expected['score'], overall
+        assert scored['grade'][i] == expected['grade'], overall
+        for part, value in expected['breakdown'].items():
+            assert int(scored['breakdown'][part][i]) == value, (part, overall)
+
+
+def test_score_cohort_matches_scalar_levels_and_difficulty(overalls):
+    scored = score_cohort(**cohort_columns({'overall': overall} for overall in overalls))
+
+    for i, overall in enumerate(overalls):
+        total = overall['stats']['total']
+        if total == 0:
+            # generate_insights() is not reached for empty analyses
+            continue
+        insights = AIInsightsService.generate_insights({'platforms': {}, 'overall': overall})
+        difficulty = insights['difficultyProgression']
+        assert scored['level'][i] == insights['summary']['level'], overall
+        assert scored['difficultyLevel'][i] == difficulty['level'], overall
+        for bucket in ('easy', 'medium', 'hard'):
+            value = scored['difficultyPercentages'][bucket][i]
+            assert value == overall['stats'][bucket] / total * 100, (bucket, overall)
+            assert f"{value:.1f}" == difficulty['current'][bucket]['percentage'], (bucket, overall)
+
+
+def test_percentiles_rank_within_cohort():
+    scored = score_cohort(easy=[10, 0, 5], medium=[0, 0, 5], hard=[0, 0, 0], total=[10, 0, 10], unique=[10, 0, 10], platforms_analyzed=[1, 1, 1])
+    assert list(scored['percentile']) == pytest.approx([100 * 2 / 3, 100 / 3, 100.0])
+
+
+def test_cohort_summary_skips_empty_analyses():
+    analyses = [
+        {'overall': {'stats': {'easy': 20, 'medium': 50, 'hard': 30, 'total': 100, 'unique': 90}, 'platformsAnalyzed': 3}},
+        {'overall': {'stats': {'total': 0}, 'platformsAnalyzed': 1}},
+    ]
+    summary = cohort_summary([4, 7], [cohort_row(analysis) for analysis in analyses])
+    assert summary['scored'] == 1
+    assert [entry['index'] for entry in summary['ranks']] == [4]
+    assert summary['ranks'][0]['score'] == AIInsightsService._calculate_score({}, analyses[0]['overall'])['score']
+
+
+def test_cohort_summary_accepts_flat_rows(overalls):
+    analyses = [{'overall': overall} for overall in overalls[:500]]
+    indexes = array('q', range(len(analyses)))
+    flat = array('d')
+    for analysis in analyses:
+        flat.extend(cohort_row(analysis))
+
+    assert cohort_summary(indexes, flat) == cohort_summary(list(indexes), [cohort_row(a) for a in analyses])
+    assert cohort_summary(array('q'), array('d'))['scored'] == 0
@@ -0,0 +1,286 @@
+"""
+Platform Analyser - Request Tracing
+Opt-in per-request stage spans, returned with the response and exported
+"""
+
+import contextvars
+import functools
+import itertools
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from logs import get_logger
+
+
+log = get_logger("tracing")
+
+
+# Lets a deployment refuse the debug flag outright
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# Where finished traces go: 'log' (structured log records), 'otlp' or 'none'
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "log").lower()
+OTLP_TRACES_ENDPOINT = os.getenv("OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces")
+# Traces waiting for the OTLP exporter; more are dropped rather than queued
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "100"))
+SERVICE_NAME = os.getenv("SERVICE_NAME", "platform-analyser")
+
+
+# Both unset outside a traced request, which is all the disabled path checks
+_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('trace', default=None)
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('trace_parent', default=None)
+
+
+class Span:
+    """One timed stage; entering it makes it the parent of spans opened inside"""
+
+    __slots__ = ('trace', 'name', 'attrs', 'span_id', 'parent_id', 'start', 'end', '_token')
+
+    def __init__(self, trace: 'Trace', name: str, attrs: Dict[str, Any], parent_id: Optional[str]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.span_id = trace.next_span_id()
+        self.parent_id = parent_id
+        self.start = 0.0
+        self.end = 0.0
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        self._token = _parent.set(self.span_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end = time.perf_counter()
+        _parent.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace.add(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            'spanId': self.span_id,
+            'parentId': self.parent_id,
+            'name': self.name,
+            'startMs': round((self.start - self.trace.origin) * 1000, 3),
+            'durationMs': round((self.end - self.start) * 1000, 3),
+            'attributes': self.attrs
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when the request is not traced"""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans of one request, collected from the event loop and executor threads"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+
+    def next_span_id(self) -> str:
+        # OTLP span ids are 8 bytes; unique within the trace is enough
+        return f"{next(self._ids):016x}"
+
+    def add(self, span: Span):
+        # list.append is atomic, so executor threads need no lock
+        self.spans.append(span)
+
+    def to_dict(self) -> Dict:
+        spans = sorted(list(self.spans), key=lambda s: s.start)
+        return {
+            'traceId': self.trace_id,
+            'name': self.name,
+            'startedAt': self.started_at,
+            'durationMs': round((max(s.end for s in spans) - self.origin) * 1000, 3) if spans else 0.0,
+            'spans': [s.to_dict() for s in spans]
+        }
+
+
+def span(name: str, **attrs) -> Any:
+    """Context manager timing a stage of the current trace; a shared no-op when untraced"""
+    trace = _trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attrs, _parent.get())
+
+
+def record(name: str, start: float, **attrs):
+    """Add a finished span that began at `start` (perf_counter) and ends now"""
+    trace = _trace.get()
+    if trace is None:
+        return
+    finished = Span(trace, name, attrs, _parent.get())
+    finished.start = start
+    finished.end = time.perf_counter()
+    trace.add(finished)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    `fn` running in the caller's trace context
+
+    run_in_executor does not carry contextvars into the worker thread, so
+    traced calls are wrapped in a copy of the current context. Untraced
+    calls get `fn` back unchanged.
+    """
+    if _trace.get() is None:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+@contextmanager
+def start_trace(name: str, **attrs):
+    """Trace the enclosed work under a root span, then hand it to the exporter"""
+    trace = Trace(name)
+    token = _trace.set(trace)
+    try:
+        with Span(trace, name, attrs, None):
+            yield trace
+    finally:
+        _trace.reset(token)
+        exporter.export(trace)
+
+
+# ============================================================================
+# EXPORTERS
+# ============================================================================
+
+class NoopExporter:
+    def export(self, trace: Trace):
+        pass
+
+    def close(self):
+        pass
+
+
+class LogExporter:
+    """Each trace as a structured log record, for log shippers to pick up"""
+
+    def export(self, trace: Trace):
+        log.info("Request trace", trace=trace.to_dict())
+
+    def close(self):
+        pass
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_payload(trace: Trace) -> Dict:
+    """Trace as an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    wall_offset = trace.started_at - trace.origin
+    spans = []
+    for s in list(trace.spans):
+        spans.append({
+            'traceId': trace.trace_id,
+            'spanId': s.span_id,
+            'parentSpanId': s.parent_id or '',
+            'name': s.name,
+            'kind': 1,
+            'startTimeUnixNano': str(int((s.start + wall_offset) * 1e9)),
+            'endTimeUnixNano': str(int((s.end + wall_offset) * 1e9)),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in s.attrs.items()]
+        })
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': 'platform-analyser.tracing'}, 'spans': spans}]
+        }]
+    }
+
+
+class OTLPExporter:
+    """
+    Posts traces to an OTLP/HTTP collector from a background thread
+
+    export() only enqueues; when the collector falls behind and the queue
+    is full, traces are dropped and counted instead of slowing requests.
+    """
+
+    def __init__(self, endpoint: str = OTLP_TRACES_ENDPOINT, max_queue: int = TRACE_EXPORT_QUEUE_SIZE):
+        self.endpoint = endpoint
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, trace: Trace):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='otlp-exporter', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with httpx.Client(timeout=5) as client:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    client.post(self.endpoint, json=otlp_payload(trace)).raise_for_status()
+                except Exception as e:
+                    log.warning("Failed to export trace", traceId=trace.trace_id, error=str(e))
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+def build_exporter(kind: str = TRACE_EXPORTER):
+    """Exporter by name: 'log', 'otlp' or 'none'"""
+    if kind == 'otlp':
+        return OTLPExporter()
+    if kind == 'none':
+        return NoopExporter()
+    return LogExporter()
+
+
+def set_exporter(new_exporter):
+    """Swap in any object with export(trace) and close()"""
+    global exporter
+    exporter = new_exporter
+
+
+# Singleton instance
+exporter = build_exporter()